@@ -1,18 +1,20 @@
-import sys, random
+import sys, time, argparse
 from PyQt5.QtWidgets import QMainWindow, QFrame, QDesktopWidget, QApplication
-from PyQt5.QtCore import Qt, QBasicTimer, pyqtSignal
-from PyQt5.QtGui import QPainter, QColor
+from PyQt5.QtCore import Qt, QBasicTimer, QRect, pyqtSignal
+from PyQt5.QtGui import QPainter, QColor, QPixmap
+from TetrisEngine import Tetrominoe, Action, Game, Scheduler
+from TetrisAI import Bot
 class Tetris(QMainWindow):
 
-    def __init__(self):
+    def __init__(self, seed=None, recordFile=None):
         super().__init__()
 
-        self.initUI()
+        self.initUI(seed, recordFile)
 
 
-    def initUI(self):
+    def initUI(self, seed, recordFile):
 
-        self.tboard = Board(self)
+        self.tboard = Board(self, seed, recordFile)
         self.setCentralWidget(self.tboard)
 
         self.statusbar = self.statusBar()
@@ -30,44 +32,81 @@ class Tetris(QMainWindow):
 
         screen = QDesktopWidget().screenGeometry()
         size = self.geometry()
-        self.move((screen.width()-size.width())/2,
-            (screen.height()-size.height())/2)
+        self.move((screen.width()-size.width())//2,
+            (screen.height()-size.height())//2)
+
+
+    def closeEvent(self, event):
+
+        self.tboard.saveRecording()
+        super().closeEvent(event)
+def timed(handler):
+
+    # Если задан Board.frameHook, сообщает ему имя обработчика и время его работы в секундах
+    def wrapper(self, event):
+
+        if self.frameHook is None:
+            return handler(self, event)
+
+        start = time.perf_counter()
+        handler(self, event)
+        self.frameHook(handler.__name__, time.perf_counter() - start)
+
+    return wrapper
+
+
 class Board(QFrame):
 
     msg2Statusbar = pyqtSignal(str)
 
-    BoardWidth = 10
-    BoardHeight = 22
-    Speed = 300
+    BoardWidth = Game.BoardWidth
+    BoardHeight = Game.BoardHeight
+    # Таймер только будит доску, а сколько кадров игры прошло, считает Scheduler по часам
+    FrameInterval = 1000 // Game.FrameRate
+    BotFrames = 6
 
-    def __init__(self, parent):
+    KeyActions = {
+        Qt.Key_Left: Action.MoveLeft,
+        Qt.Key_Right: Action.MoveRight,
+        Qt.Key_Down: Action.RotateRight,
+        Qt.Key_Up: Action.RotateLeft,
+        Qt.Key_Space: Action.DropDown,
+        Qt.Key_D: Action.OneLineDown,
+    }
+
+    colorTable = [0x000000, 0xCC6666, 0x66CC66, 0x6666CC,
+                  0xCCCC66, 0xCC66CC, 0x66CCCC, 0xDAAA00]
+
+    GhostOpacity = 0.3
+
+    def __init__(self, parent, seed=None, recordFile=None):
         super().__init__(parent)
 
-        self.initBoard()
+        self.initBoard(seed, recordFile)
 
 
-    def initBoard(self):
+    def initBoard(self, seed, recordFile):
 
         self.timer = QBasicTimer()
-        self.isWaitingAfterLine = False
-
-        self.curX = 0
-        self.curY = 0
-        self.numLinesRemoved = 0
-        self.board = []
+        self.game = Game(seed)
+        self.scheduler = Scheduler(self.game)
 
         self.setFocusPolicy(Qt.StrongFocus)
-        self.isStarted = False
         self.isPaused = False
-        self.clearBoard()
+        self.bot = None
+        self.botTick = 0
+        self.frameHook = None
+        self.recordFile = recordFile
 
-
-    def shapeAt(self, x, y):
-        return self.board[(y * Board.BoardWidth) + x]
+        # Лежащие фигуры рисуются в stackPixmap и перестраиваются только при изменении поля,
+        # клетки каждой фигуры заранее отрисованы в tiles; всё сбрасывается при смене размера
+        self.tiles = None
+        self.stackPixmap = None
+        self.stackVersion = -1
 
 
-    def setShapeAt(self, x, y, shape):
-        self.board[(y * Board.BoardWidth) + x] = shape
+    def shapeAt(self, x, y):
+        return self.game.shapeAt(x, y)
 
 
     def squareWidth(self):
@@ -78,25 +117,57 @@ class Board(QFrame):
         return self.contentsRect().height() // Board.BoardHeight
 
 
+    def resizeEvent(self, event):
+
+        self.tiles = None
+        self.stackPixmap = None
+
+        super(Board, self).resizeEvent(event)
+
+
+    def cellOrigin(self, x, y):
+
+        rect = self.contentsRect()
+        boardTop = rect.bottom() - Board.BoardHeight * self.squareHeight()
+
+        return (rect.left() + x * self.squareWidth(),
+                boardTop + (Board.BoardHeight - y - 1) * self.squareHeight())
+
+
+    def pieceRect(self):
+
+        # Фигура вместе с её тенью в месте падения
+        piece = self.game.curPiece
+
+        if piece.shape() == Tetrominoe.NoShape:
+            return QRect()
+
+        minX, maxX, minY, maxY = piece.bounds
+        left, top = self.cellOrigin(self.game.curX + minX, self.game.curY - minY)
+        bottom = self.cellOrigin(0, self.game.dropPosition() - maxY)[1] + self.squareHeight()
+
+        return QRect(left, top, (maxX - minX + 1) * self.squareWidth(), bottom - top)
+
+
     def start(self):
 
         if self.isPaused:
             return
 
-        self.isStarted = True
-        self.isWaitingAfterLine = False
-        self.numLinesRemoved = 0
-        self.clearBoard()
+        self.saveRecording()
+        self.game.start()
+        self.scheduler.reset()
+        self.botTick = 0
 
-        self.msg2Statusbar.emit(str(self.numLinesRemoved))
+        self.msg2Statusbar.emit(str(self.game.numLinesRemoved))
 
-        self.newPiece()
-        self.timer.start(Board.Speed, self)
+        self.timer.start(Board.FrameInterval, Qt.PreciseTimer, self)
+        self.update()
 
 
     def pause(self):
 
-        if not self.isStarted:
+        if not self.game.isStarted:
             return
 
         self.isPaused = not self.isPaused
@@ -106,192 +177,180 @@ class Board(QFrame):
             self.msg2Statusbar.emit("paused")
 
         else:
-            self.timer.start(Board.Speed, self)
-            self.msg2Statusbar.emit(str(self.numLinesRemoved))
+            self.scheduler.reset()
+            self.timer.start(Board.FrameInterval, Qt.PreciseTimer, self)
+            self.msg2Statusbar.emit(str(self.game.numLinesRemoved))
 
         self.update()
 
-    def paintEvent(self, event):
-
-        painter = QPainter(self)
-        rect = self.contentsRect()
+    def toggleAutoplay(self):
 
-        boardTop = rect.bottom() - Board.BoardHeight * self.squareHeight()
+        if self.bot is None:
+            # Без пула процессов: перебор с заглядыванием укладывается в кадр,
+            # а процессы, порождённые из Qt, только держали бы поток интерфейса на executor.map
+            self.bot = Bot(workers=0)
+            self.msg2Statusbar.emit("autoplay")
 
-        for i in range(Board.BoardHeight):
-            for j in range(Board.BoardWidth):
-                shape = self.shapeAt(j, Board.BoardHeight - i - 1)
+        else:
+            self.bot.close()
+            self.bot = None
+            self.msg2Statusbar.emit(str(self.game.numLinesRemoved))
 
-                if shape != Tetrominoe.NoShape:
-                    self.drawSquare(painter,
-                                    rect.left() + j * self.squareWidth(),
-                                    boardTop + i * self.squareHeight(), shape)
+    def saveRecording(self):
 
-        if self.curPiece.shape() != Tetrominoe.NoShape:
+        # Партия целиком пишется в recordFile (если задан); проверить её можно через TetrisEngine.py
+        if self.recordFile and self.game.recording is not None and self.game.recording.events:
+            self.game.finishRecording().save(self.recordFile)
 
-            for i in range(4):
-                x = self.curX + self.curPiece.x(i)
-                y = self.curY - self.curPiece.y(i)
-                self.drawSquare(painter, rect.left() + x * self.squareWidth(),
-                                boardTop + (Board.BoardHeight - y - 1) * self.squareHeight(),
-                                self.curPiece.shape())
+    def play(self, move, *args):
 
-    def keyPressEvent(self, event):
+        lines = self.game.numLinesRemoved
+        version = self.game.stackVersion
+        state = (self.game.curPiece, self.game.curX, self.game.curY)
+        oldRect = self.pieceRect()
+        move(*args)
 
-        if not self.isStarted or self.curPiece.shape() == Tetrominoe.NoShape:
-            super(Board, self).keyPressEvent(event)
-            return
-
-        key = event.key()
-
-        if key == Qt.Key_P:
-            self.pause()
-            return
-
-        if self.isPaused:
+        if self.game.stackVersion == version and state == (self.game.curPiece, self.game.curX, self.game.curY):
             return
 
-        elif key == Qt.Key_Left:
-            self.tryMove(self.curPiece, self.curX - 1, self.curY)
+        if self.game.numLinesRemoved != lines:
+            self.msg2Statusbar.emit(str(self.game.numLinesRemoved))
 
-        elif key == Qt.Key_Right:
-            self.tryMove(self.curPiece, self.curX + 1, self.curY)
+        if not self.game.isStarted:
+            self.timer.stop()
+            self.msg2Statusbar.emit("Game over")
+            self.saveRecording()
 
-        elif key == Qt.Key_Down:
-            self.tryMove(self.curPiece.rotateRight(), self.curX, self.curY)
+        # Если поле не менялось, перерисовываем только старое и новое место фигуры
+        if self.game.stackVersion != version:
+            self.update()
+        else:
+            self.update(oldRect.united(self.pieceRect()))
 
-        elif key == Qt.Key_Up:
-            self.tryMove(self.curPiece.rotateLeft(), self.curX, self.curY)
+    def renderTile(self, shape, opacity):
 
-        elif key == Qt.Key_Space:
-            self.dropDown()
+        tile = QPixmap(max(self.squareWidth(), 1), max(self.squareHeight(), 1))
+        tile.fill(Qt.transparent)
 
-        elif key == Qt.Key_D:
-            self.oneLineDown()
+        painter = QPainter(tile)
+        painter.setOpacity(opacity)
+        self.drawSquare(painter, 0, 0, shape)
+        painter.end()
 
-        else:
-            super(Board, self).keyPressEvent(event)
+        return tile
 
-    def timerEvent(self, event):
+    def renderTiles(self):
 
-        if event.timerId() == self.timer.timerId():
+        self.tiles = [None] + [self.renderTile(shape, 1.0) for shape in range(1, len(Board.colorTable))]
+        self.ghostTiles = [None] + [self.renderTile(shape, Board.GhostOpacity)
+                                    for shape in range(1, len(Board.colorTable))]
 
-            if self.isWaitingAfterLine:
-                self.isWaitingAfterLine = False
-                self.newPiece()
-            else:
-                self.oneLineDown()
+    def renderStack(self):
 
-        else:
-            super(Board, self).timerEvent(event)
-
-    def clearBoard(self):
-
-        for i in range(Board.BoardHeight * Board.BoardWidth):
-            self.board.append(Tetrominoe.NoShape)
+        rect = self.contentsRect()
+        self.stackPixmap = QPixmap(max(rect.width(), 1), max(rect.height(), 1))
+        self.stackPixmap.fill(Qt.transparent)
 
-    def dropDown(self):
+        painter = QPainter(self.stackPixmap)
+        painter.translate(-rect.left(), -rect.top())
 
-        newY = self.curY
+        for y, row in enumerate(self.game.rows):
 
-        while newY > 0:
+            if not row:
+                continue
 
-            if not self.tryMove(self.curPiece, self.curX, newY - 1):
-                break
+            for x, shape in enumerate(self.game.colors[y]):
+                if shape != Tetrominoe.NoShape:
+                    painter.drawPixmap(*self.cellOrigin(x, y), self.tiles[shape])
 
-            newY -= 1
+        painter.end()
+        self.stackVersion = self.game.stackVersion
 
-        self.pieceDropped()
+    @timed
+    def paintEvent(self, event):
 
-    def oneLineDown(self):
+        if self.tiles is None:
+            self.renderTiles()
 
-        if not self.tryMove(self.curPiece, self.curX, self.curY - 1):
-            self.pieceDropped()
+        if self.stackPixmap is None or self.stackVersion != self.game.stackVersion:
+            self.renderStack()
 
-    def pieceDropped(self):
+        painter = QPainter(self)
+        rect = self.contentsRect()
+        dirty = event.rect().intersected(rect)
 
-        for i in range(4):
-            x = self.curX + self.curPiece.x(i)
-            y = self.curY - self.curPiece.y(i)
-            self.setShapeAt(x, y, self.curPiece.shape())
+        painter.drawPixmap(dirty, self.stackPixmap, dirty.translated(-rect.left(), -rect.top()))
 
-        self.removeFullLines()
+        curPiece = self.game.curPiece
 
-        if not self.isWaitingAfterLine:
-            self.newPiece()
+        if curPiece.shape() != Tetrominoe.NoShape:
 
-    def removeFullLines(self):
+            tile = self.ghostTiles[curPiece.shape()]
+            ghostY = self.game.dropPosition()
 
-        numFullLines = 0
-        rowsToRemove = []
+            for dx, dy in curPiece.coords:
+                painter.drawPixmap(*self.cellOrigin(self.game.curX + dx, ghostY - dy), tile)
 
-        for i in range(Board.BoardHeight):
+            tile = self.tiles[curPiece.shape()]
 
-            n = 0
-            for j in range(Board.BoardWidth):
-                if not self.shapeAt(j, i) == Tetrominoe.NoShape:
-                    n = n + 1
+            for dx, dy in curPiece.coords:
+                painter.drawPixmap(*self.cellOrigin(self.game.curX + dx, self.game.curY - dy), tile)
 
-            if n == 10:
-                rowsToRemove.append(i)
+    def keyPressEvent(self, event):
 
-        rowsToRemove.reverse()
+        if not self.game.isStarted or self.game.curPiece.shape() == Tetrominoe.NoShape:
+            super(Board, self).keyPressEvent(event)
+            return
 
-        for m in rowsToRemove:
+        key = event.key()
 
-            for k in range(m, Board.BoardHeight):
-                for l in range(Board.BoardWidth):
-                    self.setShapeAt(l, k, self.shapeAt(l, k + 1))
+        if key == Qt.Key_P:
+            self.pause()
+            return
 
-        numFullLines = numFullLines + len(rowsToRemove)
+        if self.isPaused:
+            return
 
-        if numFullLines > 0:
-            self.numLinesRemoved = self.numLinesRemoved + numFullLines
-            self.msg2Statusbar.emit(str(self.numLinesRemoved))
+        if key == Qt.Key_A:
+            self.toggleAutoplay()
 
-            self.isWaitingAfterLine = True
-            self.curPiece.setShape(Tetrominoe.NoShape)
-            self.update()
+        elif key in Board.KeyActions:
+            # Автоповтор системы не нужен: повторы при удержании считает Scheduler
+            if not event.isAutoRepeat():
+                self.play(self.scheduler.press, Board.KeyActions[key])
 
-    def newPiece(self):
+        else:
+            super(Board, self).keyPressEvent(event)
 
-        self.curPiece = Shape()
-        self.curPiece.setRandomShape()
-        self.curX = Board.BoardWidth // 2 + 1
-        self.curY = Board.BoardHeight - 1 + self.curPiece.minY()
+    def keyReleaseEvent(self, event):
 
-        if not self.tryMove(self.curPiece, self.curX, self.curY):
-            self.curPiece.setShape(Tetrominoe.NoShape)
-            self.timer.stop()
-            self.isStarted = False
-            self.msg2Statusbar.emit("Game over")
+        if event.key() in Board.KeyActions and not event.isAutoRepeat():
+            self.scheduler.release(Board.KeyActions[event.key()])
 
-    def tryMove(self, newPiece, newX, newY):
+        else:
+            super(Board, self).keyReleaseEvent(event)
 
-        for i in range(4):
+    @timed
+    def timerEvent(self, event):
 
-            x = newX + newPiece.x(i)
-            y = newY - newPiece.y(i)
+        if event.timerId() == self.timer.timerId():
 
-            if x < 0 or x >= Board.BoardWidth or y < 0 or y >= Board.BoardHeight:
-                return False
+            # В режиме автоигры бот ставит по фигуре раз в BotFrames кадров
+            if (self.bot is not None and self.game.curPiece.shape() != Tetrominoe.NoShape
+                    and self.game.ticks - self.botTick >= Board.BotFrames):
+                self.botTick = self.game.ticks
 
-            if self.shapeAt(x, y) != Tetrominoe.NoShape:
-                return False
+                for action in self.bot.actions(self.game):
+                    self.play(self.game.handle, action)
 
-        self.curPiece = newPiece
-        self.curX = newX
-        self.curY = newY
-        self.update()
+            self.play(self.scheduler.update)
 
-        return True
+        else:
+            super(Board, self).timerEvent(event)
 
     def drawSquare(self, painter, x, y, shape):
 
-        colorTable = [0x000000, 0xCC6666, 0x66CC66, 0x6666CC,
-                      0xCCCC66, 0xCC66CC, 0x66CCCC, 0xDAAA00]
-
-        color = QColor(colorTable[shape])
+        color = QColor(Board.colorTable[shape])
         painter.fillRect(x + 1, y + 1, self.squareWidth() - 2,
                          self.squareHeight() - 2, color)
 
@@ -304,134 +363,13 @@ class Board(QFrame):
                          x + self.squareWidth() - 1, y + self.squareHeight() - 1)
         painter.drawLine(x + self.squareWidth() - 1,
                          y + self.squareHeight() - 1, x + self.squareWidth() - 1, y + 1)
-class Tetrominoe(object):
-
-    NoShape = 0
-    ZShape = 1
-    SShape = 2
-    LineShape = 3
-    TShape = 4
-    SquareShape = 5
-    LShape = 6
-    MirroredLShape = 7
-class Shape(object):
-
-    coordsTable = (
-        ((0, 0),     (0, 0),     (0, 0),     (0, 0)),
-        ((0, -1),    (0, 0),     (-1, 0),    (-1, 1)),
-        ((0, -1),    (0, 0),     (1, 0),     (1, 1)),
-        ((0, -1),    (0, 0),     (0, 1),     (0, 2)),
-        ((-1, 0),    (0, 0),     (1, 0),     (0, 1)),
-        ((0, 0),     (1, 0),     (0, 1),     (1, 1)),
-        ((-1, -1),   (0, -1),    (0, 0),     (0, 1)),
-        ((1, -1),    (0, -1),    (0, 0),     (0, 1))
-    )
-
-    def __init__(self):
-
-        self.coords = [[0,0] for i in range(4)]
-        self.pieceShape = Tetrominoe.NoShape
-
-        self.setShape(Tetrominoe.NoShape)
-
-
-    def shape(self):
-        return self.pieceShape
-
-
-    def setShape(self, shape):
-
-        table = Shape.coordsTable[shape]
-
-        for i in range(4):
-            for j in range(2):
-                self.coords[i][j] = table[i][j]
-
-        self.pieceShape = shape
-
-
-    def setRandomShape(self):
-        self.setShape(random.randint(1, 7))
-
-
-    def x(self, index):
-        return self.coords[index][0]
-
-
-    def y(self, index):
-        return self.coords[index][1]
-
-
-    def setX(self, index, x):
-        self.coords[index][0] = x
-
-
-    def setY(self, index, y):
-        self.coords[index][1] = y
-
-
-    def minX(self):
-
-        m = self.coords[0][0]
-        for i in range(4):
-            m = min(m, self.coords[i][0])
-
-        return m
-
-    def maxX(self):
-
-        m = self.coords[0][0]
-        for i in range(4):
-            m = max(m, self.coords[i][0])
-
-        return m
-
-    def minY(self):
-
-        m = self.coords[0][1]
-        for i in range(4):
-            m = min(m, self.coords[i][1])
-
-        return m
-
-    def maxY(self):
-
-        m = self.coords[0][1]
-        for i in range(4):
-            m = max(m, self.coords[i][1])
-
-        return m
-
-    def rotateLeft(self):
-
-        if self.pieceShape == Tetrominoe.SquareShape:
-            return self
-
-        result = Shape()
-        result.pieceShape = self.pieceShape
-
-        for i in range(4):
-            result.setX(i, self.y(i))
-            result.setY(i, -self.x(i))
-
-        return result
-
-    def rotateRight(self):
-
-        if self.pieceShape == Tetrominoe.SquareShape:
-            return self
-
-        result = Shape()
-        result.pieceShape = self.pieceShape
-
-        for i in range(4):
-            result.setX(i, -self.y(i))
-            result.setY(i, self.x(i))
-
-        return result
-
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tetris')
+    parser.add_argument('--seed', type=int, help='seed for the piece sequence')
+    parser.add_argument('--record', metavar='FILE', help='save the game to FILE for replay')
+    args = parser.parse_args()
+
     app = QApplication([])
-    tetris = Tetris()
+    tetris = Tetris(args.seed, args.record)
     sys.exit(app.exec_())
\ No newline at end of file
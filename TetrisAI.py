@@ -0,0 +1,210 @@
+import os
+import concurrent.futures
+from TetrisEngine import Tetrominoe, Action, Shape, Game, landingRow
+
+
+# Веса оценки позиции: высота, убранные линии, дыры, неровность поверхности
+HeightWeight = -0.510066
+LinesWeight = 0.760666
+HolesWeight = -0.35663
+BumpinessWeight = -0.184483
+
+LostScore = float('-inf')
+
+
+def rotations(shape):
+
+    # Одинаковые положения (у квадрата все четыре) проверяем один раз
+    return list(dict.fromkeys(Shape.table[shape]))
+
+
+def columnHeights(rows):
+
+    # Идём сверху вниз и запоминаем уже встреченные столбцы: каждый бит обрабатывается один раз
+    heights = [0] * Game.BoardWidth
+    seen = 0
+
+    for y in range(len(rows) - 1, -1, -1):
+        new = rows[y] & ~seen
+
+        while new:
+            low = new & -new
+            heights[low.bit_length() - 1] = y + 1
+            seen |= low
+            new ^= low
+
+        if seen == Game.FullRow:
+            break
+
+    return heights
+
+
+def dropPosition(heights, piece, x):
+
+    minX, maxX, minY, maxY = piece.bounds
+
+    if x + minX < 0 or x + maxX >= Game.BoardWidth:
+        return None
+
+    y = landingRow(heights, piece, x)
+
+    if y - minY >= Game.BoardHeight:
+        return None
+
+    return y
+
+
+def place(rows, piece, x, y):
+
+    rows = list(rows)
+    minX, maxX, minY, maxY = piece.bounds
+    left = x + minX
+
+    for dy, mask in piece.rowMasks:
+        rows[y - dy] |= mask << left
+
+    full = [i for i in range(y - maxY, y - minY + 1) if rows[i] == Game.FullRow]
+
+    for i in reversed(full):
+        del rows[i]
+
+    rows.extend([0] * len(full))
+
+    return rows, len(full)
+
+
+def placements(rows, shape, heights=None):
+
+    if heights is None:
+        heights = columnHeights(rows)
+
+    for piece in rotations(shape):
+        minX, maxX = piece.bounds[0], piece.bounds[1]
+
+        for x in range(-minX, Game.BoardWidth - maxX):
+            y = dropPosition(heights, piece, x)
+
+            if y is not None:
+                newRows, lines = place(rows, piece, x, y)
+                yield piece, x, newRows, lines
+
+
+def evaluate(rows, lines):
+
+    heights = columnHeights(rows)
+    height = sum(heights)
+    filled = sum(bin(row).count('1') for row in rows[:max(heights)])
+    holes = height - filled
+    bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+
+    return (HeightWeight * height + LinesWeight * lines +
+            HolesWeight * holes + BumpinessWeight * bumpiness)
+
+
+def bestScore(rows, lines, shape):
+
+    # Лучшая оценка после установки следующей фигуры; выполняется и в рабочих процессах
+    return max((evaluate(newRows, lines + more) for piece, x, newRows, more in placements(rows, shape)),
+               default=LostScore)
+
+
+def bestScores(tasks):
+    return [bestScore(rows, lines, shape) for rows, lines, shape in tasks]
+
+
+class Bot(object):
+
+    # Перебирает все положения (поворот, столбец) текущей фигуры и, если включено,
+    # следующей. Второй уровень перебора раздаётся пакетами в пул процессов; workers=0 — без пула
+
+    def __init__(self, lookahead=True, workers=None):
+
+        self.lookahead = lookahead
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None
+
+        if lookahead and workers != 0:
+            self.executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+
+
+    def close(self):
+
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+    def choose(self, game):
+
+        shape = game.curPiece.shape()
+
+        if shape == Tetrominoe.NoShape:
+            return None
+
+        candidates = list(placements(game.rows, shape, game.heights))
+
+        if not candidates:
+            return None
+
+        if self.lookahead and game.nextPiece.shape() != Tetrominoe.NoShape:
+            tasks = [(newRows, lines, game.nextPiece.shape()) for piece, x, newRows, lines in candidates]
+
+            if self.executor is not None:
+                size = -(-len(tasks) // self.workers)
+                batches = [tasks[i:i + size] for i in range(0, len(tasks), size)]
+                scores = [score for batch in self.executor.map(bestScores, batches) for score in batch]
+            else:
+                scores = bestScores(tasks)
+
+        else:
+            scores = [evaluate(newRows, lines) for piece, x, newRows, lines in candidates]
+
+        best = max(range(len(candidates)), key=scores.__getitem__)
+        piece, x = candidates[best][:2]
+
+        return piece, x
+
+    def actions(self, game):
+
+        choice = self.choose(game)
+
+        if choice is None:
+            return [Action.DropDown]
+
+        target, x = choice
+        piece, curX, curY = game.curPiece, game.curX, game.curY
+        turns = (target.rotation - piece.rotation) % 4
+        rotate = Action.RotateLeft if turns == 3 else Action.RotateRight
+        plan = []
+
+        for i in range(1 if turns == 3 else turns):
+            rotated = piece.rotateLeft() if turns == 3 else piece.rotateRight()
+
+            # У верхнего края повёрнутая фигура может не поместиться — сначала опускаем её
+            while game.collides(rotated, curX, curY) and not game.collides(piece, curX, curY - 1):
+                plan.append(Action.OneLineDown)
+                curY -= 1
+
+            plan.append(rotate)
+            piece = rotated
+
+        shift = x - curX
+        plan += [Action.MoveRight if shift > 0 else Action.MoveLeft] * abs(shift)
+        plan.append(Action.DropDown)
+
+        return plan
+
+
+def autoplay(game, bot, maxPieces=None):
+
+    # Доигрывает партию без окна: фигуры ставит бот, паузы после линий проходят через tick()
+    while game.isStarted and (maxPieces is None or game.numPieces < maxPieces):
+
+        if game.curPiece.shape() == Tetrominoe.NoShape:
+            game.tick()
+            continue
+
+        for action in bot.actions(game):
+            game.handle(action)
+
+    return game
\ No newline at end of file
@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import random
+import pstats
+import cProfile
+import argparse
+import platform
+from TetrisEngine import Action, Game
+from TetrisAI import Bot, autoplay
+
+
+# Сдвигов больше, чем сбросов: иначе фигуры падают в середину стакана и партия быстро кончается.
+# Линии случайная игра всё равно почти не убирает — для этого есть политика bot
+RandomActions = ([Action.NoAction] * 2 + [Action.MoveLeft] * 4 + [Action.MoveRight] * 4 +
+                 [Action.RotateRight] * 2 + [Action.RotateLeft] * 2 + [Action.OneLineDown] * 2 + [Action.DropDown])
+
+
+def percentile(samples, p):
+
+    if not samples:
+        return None
+
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))]
+
+
+def runGames(games, seed, policy, maxPieces):
+
+    # Партии с номерами seed, seed + 1, ...: одинаковые аргументы дают одинаковые партии
+    bot = Bot(lookahead=False, workers=0) if policy == 'bot' else None
+    totals = {'pieces': 0, 'lines': 0, 'ticks': 0}
+
+    for i in range(games):
+        game = Game(seed + i)
+        game.start()
+
+        if bot is not None:
+            autoplay(game, bot, maxPieces)
+
+        else:
+            rng = random.Random(seed + i)
+
+            while game.isStarted and game.numPieces < maxPieces:
+                game.step(rng.choice(RandomActions))
+
+        totals['pieces'] += game.numPieces
+        totals['lines'] += game.numLinesRemoved
+        totals['ticks'] += game.ticks
+
+    return totals
+
+
+def functionTimes(games, seed, policy, maxPieces, top):
+
+    # Отдельный прогон под cProfile: профилировщик замедляет код, поэтому в общие цифры он не попадает
+    profile = cProfile.Profile()
+    profile.enable()
+    runGames(games, seed, policy, maxPieces)
+    profile.disable()
+
+    stats = pstats.Stats(profile).stats
+    total = sum(tt for cc, nc, tt, ct, callers in stats.values()) or 1
+    rows = []
+
+    for (file_name, line, name), (cc, nc, tt, ct, callers) in stats.items():
+        if file_name.endswith(('TetrisEngine.py', 'TetrisAI.py')):
+            rows.append({
+                'function': f"{os.path.basename(file_name)}:{line}({name})",
+                'calls': nc,
+                'total_s': round(tt, 6),
+                'cumulative_s': round(ct, 6),
+                'share': round(tt / total, 4),
+            })
+
+    rows.sort(key=lambda row: row['total_s'], reverse=True)
+    return rows[:top]
+
+
+class FrameStats(object):
+
+    # Подключается к Board.frameHook и копит длительности paintEvent/timerEvent живой игры
+
+    def __init__(self):
+        self.samples = {}
+
+
+    def __call__(self, name, seconds):
+        self.samples.setdefault(name, []).append(seconds)
+
+
+    def report(self):
+
+        return [{
+            'handler': name,
+            'count': len(samples),
+            'total_s': round(sum(samples), 6),
+            'p50_ms': round(percentile(samples, 50) * 1000, 4),
+            'p95_ms': round(percentile(samples, 95) * 1000, 4),
+            'p99_ms': round(percentile(samples, 99) * 1000, 4),
+            'max_ms': round(max(samples) * 1000, 4),
+        } for name, samples in sorted(self.samples.items())]
+
+
+def runLive():
+
+    # Qt нужен только здесь, поэтому обычный замер работает и без дисплея
+    from PyQt5.QtWidgets import QApplication
+    from Tetris import Tetris
+
+    stats = FrameStats()
+    app = QApplication([])
+    tetris = Tetris()
+    tetris.tboard.frameHook = stats
+    app.exec_()
+
+    return stats.report()
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Замеры правил Тетриса без окна и профилирование живой игры")
+    parser.add_argument('--games', type=int, default=20, help="число партий")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--policy', choices=['random', 'bot'], default='bot',
+                        help="кто играет: бот (по умолчанию, убирает линии) или случайные нажатия")
+    parser.add_argument('--max-pieces', type=int, default=500, help="предел фигур на партию")
+    parser.add_argument('--profile', type=int, default=15, metavar='N',
+                        help="сколько самых затратных функций показать (0 — без профилирования)")
+    parser.add_argument('--live', action='store_true',
+                        help="запустить игру в окне и замерить paintEvent/timerEvent")
+    parser.add_argument('--output', help="файл для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+    if args.live:
+        report['frames'] = runLive()
+
+    else:
+        start = time.perf_counter()
+        totals = runGames(args.games, args.seed, args.policy, args.max_pieces)
+        elapsed = time.perf_counter() - start
+
+        report.update({
+            'policy': args.policy,
+            'games': args.games,
+            'seed': args.seed,
+            'seconds': round(elapsed, 6),
+            'games_per_s': round(args.games / elapsed, 1),
+            'pieces_per_s': round(totals['pieces'] / elapsed, 1),
+            'lines_per_s': round(totals['lines'] / elapsed, 1),
+            'ticks_per_s': round(totals['ticks'] / elapsed, 1),
+        })
+        report.update(totals)
+
+        if args.profile:
+            report['functions'] = functionTimes(args.games, args.seed, args.policy,
+                                                args.max_pieces, args.profile)
+
+    text = json.dumps(report, indent=4, ensure_ascii=False)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,739 @@
+import time
+import random
+import bisect
+import struct
+
+
+class Tetrominoe(object):
+
+    NoShape = 0
+    ZShape = 1
+    SShape = 2
+    LineShape = 3
+    TShape = 4
+    SquareShape = 5
+    LShape = 6
+    MirroredLShape = 7
+
+
+class Action(object):
+
+    NoAction = 0
+    MoveLeft = 1
+    MoveRight = 2
+    RotateRight = 3
+    RotateLeft = 4
+    DropDown = 5
+    OneLineDown = 6
+
+
+class Recording(object):
+
+    # Запись партии: зерно и пары (такт, действие). В файле каждое действие занимает
+    # varint из (разница тактов << 3 | действие), обычно один байт; запись End завершает
+    # партию и хранит итог (линии, фигуры) для проверки при воспроизведении
+
+    Magic = b'TTRP'
+    Version = 2
+    End = 7
+
+    def __init__(self, seed, events=None, ticks=0, lines=0, pieces=0):
+
+        self.seed = seed
+        self.events = events if events is not None else []
+        self.ticks = ticks
+        self.lines = lines
+        self.pieces = pieces
+
+
+    def toBytes(self):
+
+        out = bytearray(Recording.Magic)
+        out += struct.pack('<BQ', Recording.Version, self.seed)
+        last = 0
+
+        for tick, action in self.events:
+            writeVarint(out, (tick - last) << 3 | action)
+            last = tick
+
+        writeVarint(out, (self.ticks - last) << 3 | Recording.End)
+        writeVarint(out, self.lines)
+        writeVarint(out, self.pieces)
+
+        return bytes(out)
+
+    @staticmethod
+    def fromBytes(data):
+
+        if data[:4] != Recording.Magic:
+            raise ValueError("Not a Tetris recording")
+
+        version, seed = struct.unpack_from('<BQ', data, 4)
+
+        if version != Recording.Version:
+            raise ValueError("Unsupported recording version %d" % version)
+
+        recording = Recording(seed)
+        pos = 4 + struct.calcsize('<BQ')
+        tick = 0
+
+        while True:
+            value, pos = readVarint(data, pos)
+            tick += value >> 3
+
+            if value & 7 == Recording.End:
+                break
+
+            recording.events.append((tick, value & 7))
+
+        recording.ticks = tick
+        recording.lines, pos = readVarint(data, pos)
+        recording.pieces, pos = readVarint(data, pos)
+
+        return recording
+
+    def save(self, file_name):
+
+        with open(file_name, 'wb') as file:
+            file.write(self.toBytes())
+
+    @staticmethod
+    def load(file_name):
+
+        with open(file_name, 'rb') as file:
+            return Recording.fromBytes(file.read())
+
+
+def writeVarint(out, value):
+
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+
+    out.append(value)
+
+
+def readVarint(data, pos):
+
+    value = shift = 0
+
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+
+        if byte < 0x80:
+            return value, pos
+
+
+def landingRow(heights, piece, x):
+
+    # Строка, на которую встанет фигура, падая сверху в столбце x: для каждого её столбца
+    # нижняя клетка не может опуститься ниже высоты этого столбца
+    return max(heights[x + dx] + dy for dx, dy in piece.columns)
+
+
+class Shape(object):
+
+    coordsTable = (
+        ((0, 0),     (0, 0),     (0, 0),     (0, 0)),
+        ((0, -1),    (0, 0),     (-1, 0),    (-1, 1)),
+        ((0, -1),    (0, 0),     (1, 0),     (1, 1)),
+        ((0, -1),    (0, 0),     (0, 1),     (0, 2)),
+        ((-1, 0),    (0, 0),     (1, 0),     (0, 1)),
+        ((0, 0),     (1, 0),     (0, 1),     (1, 1)),
+        ((-1, -1),   (0, -1),    (0, 0),     (0, 1)),
+        ((1, -1),    (0, -1),    (0, 0),     (0, 1))
+    )
+
+    # Фигуры неизменяемы: все положения строятся один раз при импорте (см. Shape.table ниже)
+    # и дальше только переиспользуются, так что поворот и сдвиг ничего не создают
+    table = ()
+
+    __slots__ = ('pieceShape', 'rotation', 'coords', 'bounds', 'columns', 'rowMasks')
+
+    def __init__(self, shape=Tetrominoe.NoShape, rotation=0):
+
+        coords = Shape.coordsTable[shape]
+
+        for i in range(rotation):
+            coords = tuple((-y, x) for x, y in coords)
+
+        minX = min(x for x, y in coords)
+        maxX = max(x for x, y in coords)
+        minY = min(y for x, y in coords)
+        maxY = max(y for x, y in coords)
+
+        self.pieceShape = shape
+        self.rotation = rotation
+        self.coords = coords
+        self.bounds = (minX, maxX, minY, maxY)
+
+        # Для каждого столбца фигуры — смещение нижней клетки: по нему считается место падения
+        self.columns = tuple((i, max(y for x, y in coords if x == i)) for i in range(minX, maxX + 1))
+
+        # Маски строк от левого края фигуры: проверка столкновения — один AND на строку
+        self.rowMasks = tuple((i, sum(1 << (x - minX) for x, y in coords if y == i))
+                              for i in range(minY, maxY + 1))
+
+
+    @staticmethod
+    def get(shape, rotation=0):
+        return Shape.table[shape][rotation % 4]
+
+
+    @staticmethod
+    def randomShape(rng=random):
+        return Shape.table[rng.randint(1, 7)][0]
+
+
+    def shape(self):
+        return self.pieceShape
+
+
+    def x(self, index):
+        return self.coords[index][0]
+
+
+    def y(self, index):
+        return self.coords[index][1]
+
+
+    def minX(self):
+        return self.bounds[0]
+
+    def maxX(self):
+        return self.bounds[1]
+
+    def minY(self):
+        return self.bounds[2]
+
+    def maxY(self):
+        return self.bounds[3]
+
+    def rotateLeft(self):
+        return Shape.table[self.pieceShape][(self.rotation - 1) % 4]
+
+    def rotateRight(self):
+        return Shape.table[self.pieceShape][(self.rotation + 1) % 4]
+
+
+Shape.table = tuple(
+    (Shape(shape),) * 4 if shape in (Tetrominoe.NoShape, Tetrominoe.SquareShape)
+    else tuple(Shape(shape, rotation) for rotation in range(4))
+    for shape in range(8)
+)
+
+
+class Game(object):
+
+    # Правила игры без Qt: время идёт только через tick()/step(), один такт — один кадр
+    # длиной 1/FrameRate секунды, поэтому партию можно прогнать без окна сколько угодно быстро
+
+    BoardWidth = 10
+    BoardHeight = 22
+    FullRow = (1 << BoardWidth) - 1
+
+    FrameRate = 60
+    # Кадров на одну строку падения по уровням; уровень растёт каждые LinesPerLevel линий
+    GravityFrames = (18, 16, 14, 12, 10, 8, 7, 6, 5, 4, 3, 3, 2, 2, 2, 1)
+    LinesPerLevel = 10
+    # Лежащая фигура фиксируется через LockDelay кадров; сдвиг или поворот откладывает это,
+    # но не больше MaxLockResets раз, чтобы фигуру нельзя было крутить бесконечно
+    LockDelay = 30
+    MaxLockResets = 15
+    LineClearFrames = 18
+
+    def __init__(self, seed=None):
+
+        # Поле хранится построчно: rows[y] — битовая маска занятых клеток (бит x — столбец x),
+        # colors[y] — цвета фигур той же строки, нужны только для отрисовки
+        self.random = random.Random(seed)
+        self.seed = None
+        self.bag = []
+        self.recording = None
+        self.rows = []
+        self.colors = []
+        self.curPiece = Shape.get(Tetrominoe.NoShape)
+        self.nextPiece = Shape.get(Tetrominoe.NoShape)
+        self.curX = 0
+        self.curY = 0
+        self.numLinesRemoved = 0
+        self.numPieces = 0
+        self.ticks = 0
+        self.isStarted = False
+        self.isWaitingAfterLine = False
+        self.level = 0
+        self.gravity = 0
+        self.lockFrames = 0
+        self.lockResets = 0
+        self.lineDelay = 0
+        # Растёт при каждом изменении лежащих на поле клеток — по нему отрисовка понимает,
+        # что закэшированную картинку поля пора перестроить
+        self.stackVersion = 0
+        self.clearBoard()
+
+
+    def shapeAt(self, x, y):
+        return self.colors[y][x]
+
+
+    def setShapeAt(self, x, y, shape):
+
+        # Правка отдельной клетки снаружи движка: карта высот и версия поля должны остаться верными
+        self.colors[y][x] = shape
+        self.stackVersion += 1
+
+        if shape == Tetrominoe.NoShape:
+            self.rows[y] &= ~(1 << x)
+
+            if y + 1 == self.heights[x]:
+                self.heights[x] = self.columnHeight(x, y)
+
+        else:
+            self.rows[y] |= 1 << x
+            self.heights[x] = max(self.heights[x], y + 1)
+
+
+    def start(self, seed=None):
+
+        # Зерно каждой партии известно и попадает в запись, поэтому её можно повторить
+        if seed is None:
+            seed = self.random.randrange(1 << 63)
+
+        self.seed = seed
+        self.random.seed(seed)
+        self.bag = []
+        self.recording = Recording(seed)
+
+        self.isStarted = True
+        self.isWaitingAfterLine = False
+        self.numLinesRemoved = 0
+        self.numPieces = 0
+        self.ticks = 0
+        self.level = 0
+        self.clearBoard()
+
+        self.nextPiece = self.randomPiece()
+        self.newPiece()
+
+    def randomPiece(self):
+
+        # «Мешок» из семи фигур: каждая встречается ровно раз за семь подряд
+        if not self.bag:
+            self.bag = list(range(1, 8))
+            self.random.shuffle(self.bag)
+
+        return Shape.get(self.bag.pop())
+
+    def finishRecording(self):
+
+        recording = self.recording
+        recording.ticks = self.ticks
+        recording.lines = self.numLinesRemoved
+        recording.pieces = self.numPieces
+
+        return recording
+
+    def snapshot(self):
+
+        return (list(self.rows), [list(row) for row in self.colors], self.curPiece, self.nextPiece,
+                self.curX, self.curY, self.numLinesRemoved, self.numPieces, self.ticks,
+                self.isStarted, self.isWaitingAfterLine, list(self.bag), self.random.getstate(),
+                (self.level, self.gravity, self.lockFrames, self.lockResets, self.lineDelay))
+
+    def restore(self, state):
+
+        (rows, colors, self.curPiece, self.nextPiece, self.curX, self.curY, self.numLinesRemoved,
+         self.numPieces, self.ticks, self.isStarted, self.isWaitingAfterLine, bag, randomState,
+         (self.level, self.gravity, self.lockFrames, self.lockResets, self.lineDelay)) = state
+
+        self.rows = list(rows)
+        self.colors = [list(row) for row in colors]
+        self.heights = [self.columnHeight(x, Game.BoardHeight) for x in range(Game.BoardWidth)]
+        self.bag = list(bag)
+        self.random.setstate(randomState)
+        self.stackVersion += 1
+
+    def isOver(self):
+        return not self.isStarted and self.curPiece.shape() == Tetrominoe.NoShape
+
+    def handle(self, action):
+
+        if not self.isStarted or self.curPiece.shape() == Tetrominoe.NoShape:
+            return False
+
+        if self.recording is not None:
+            self.recording.events.append((self.ticks, action))
+
+        if action == Action.MoveLeft:
+            moved = self.tryMove(self.curPiece, self.curX - 1, self.curY)
+
+        elif action == Action.MoveRight:
+            moved = self.tryMove(self.curPiece, self.curX + 1, self.curY)
+
+        elif action == Action.RotateRight:
+            moved = self.tryMove(self.curPiece.rotateRight(), self.curX, self.curY)
+
+        elif action == Action.RotateLeft:
+            moved = self.tryMove(self.curPiece.rotateLeft(), self.curX, self.curY)
+
+        elif action == Action.DropDown:
+            self.dropDown()
+            return True
+
+        elif action == Action.OneLineDown:
+            self.oneLineDown()
+            return True
+
+        else:
+            return False
+
+        if moved and self.lockFrames and self.lockResets < Game.MaxLockResets:
+            self.lockFrames = 0
+            self.lockResets += 1
+
+        return moved
+
+    def gravityFrames(self):
+        return Game.GravityFrames[min(self.level, len(Game.GravityFrames) - 1)]
+
+    def tick(self):
+
+        if not self.isStarted:
+            return
+
+        self.ticks += 1
+
+        if self.isWaitingAfterLine:
+            self.lineDelay -= 1
+
+            if self.lineDelay <= 0:
+                self.isWaitingAfterLine = False
+                self.newPiece()
+
+            return
+
+        if self.collides(self.curPiece, self.curX, self.curY - 1):
+            self.lockFrames += 1
+
+            if self.lockFrames >= Game.LockDelay:
+                self.pieceDropped()
+
+            return
+
+        self.lockFrames = 0
+        self.gravity += 1
+
+        if self.gravity >= self.gravityFrames():
+            self.gravity = 0
+            self.curY -= 1
+
+    def step(self, *actions):
+
+        # Один кадр: сначала ввод игрока, затем гравитация и задержки.
+        # Возвращает число линий, убранных за этот кадр
+        lines = self.numLinesRemoved
+
+        for action in actions:
+            self.handle(action)
+
+        self.tick()
+
+        return self.numLinesRemoved - lines
+
+    def clearBoard(self):
+
+        self.stackVersion += 1
+        self.rows = [0] * Game.BoardHeight
+        self.colors = [[Tetrominoe.NoShape] * Game.BoardWidth for i in range(Game.BoardHeight)]
+        # heights[x] — номер строки над верхней занятой клеткой столбца x
+        self.heights = [0] * Game.BoardWidth
+
+    def columnHeight(self, x, limit):
+
+        y = limit
+
+        while y > 0 and not self.rows[y - 1] >> x & 1:
+            y -= 1
+
+        return y
+
+    def dropPosition(self):
+
+        # Место падения текущей фигуры, оно же положение «тени»
+        y = landingRow(self.heights, self.curPiece, self.curX)
+
+        if y <= self.curY:
+            return y
+
+        # Фигура задвинута под нависающие клетки — тут высоты столбцов не помогут, спускаем построчно
+        y = self.curY
+
+        while not self.collides(self.curPiece, self.curX, y - 1):
+            y -= 1
+
+        return y
+
+    def dropDown(self):
+
+        self.curY = self.dropPosition()
+        self.pieceDropped()
+
+    def oneLineDown(self):
+
+        if not self.tryMove(self.curPiece, self.curX, self.curY - 1):
+            self.pieceDropped()
+
+    def pieceDropped(self):
+
+        piece = self.curPiece
+        left = self.curX + piece.bounds[0]
+        self.stackVersion += 1
+
+        for dy, mask in piece.rowMasks:
+            self.rows[self.curY - dy] |= mask << left
+
+        for dx, dy in piece.coords:
+            x = self.curX + dx
+            y = self.curY - dy
+            self.colors[y][x] = piece.pieceShape
+
+            if y >= self.heights[x]:
+                self.heights[x] = y + 1
+
+        self.removeFullLines()
+
+        if not self.isWaitingAfterLine:
+            self.newPiece()
+
+    def removeFullLines(self):
+
+        rowsToRemove = [i for i, row in enumerate(self.rows) if row == Game.FullRow]
+
+        # Строки выше сдвигаются сами при удалении из списка, сверху добавляются пустые
+        for m in reversed(rowsToRemove):
+            del self.rows[m]
+            del self.colors[m]
+
+        for m in rowsToRemove:
+            self.rows.append(0)
+            self.colors.append([Tetrominoe.NoShape] * Game.BoardWidth)
+
+        if rowsToRemove:
+            self.level = (self.numLinesRemoved + len(rowsToRemove)) // Game.LinesPerLevel
+            self.lineDelay = Game.LineClearFrames
+
+            # Все убранные строки лежали ниже вершины каждого столбца; если вершина сама
+            # была в убранной строке, новую ищем вниз по столбцу
+            for x in range(Game.BoardWidth):
+                self.heights[x] = self.columnHeight(x, self.heights[x] - len(rowsToRemove))
+
+            self.numLinesRemoved = self.numLinesRemoved + len(rowsToRemove)
+            self.isWaitingAfterLine = True
+            self.curPiece = Shape.get(Tetrominoe.NoShape)
+
+        return len(rowsToRemove)
+
+    def newPiece(self):
+
+        self.curPiece = self.nextPiece
+        self.nextPiece = self.randomPiece()
+        self.curX = Game.BoardWidth // 2 + 1
+        self.curY = Game.BoardHeight - 1 + self.curPiece.minY()
+        self.numPieces += 1
+        self.gravity = 0
+        self.lockFrames = 0
+        self.lockResets = 0
+
+        if not self.tryMove(self.curPiece, self.curX, self.curY):
+            self.curPiece = Shape.get(Tetrominoe.NoShape)
+            self.isStarted = False
+
+    def collides(self, piece, newX, newY):
+
+        minX, maxX, minY, maxY = piece.bounds
+
+        if newX + minX < 0 or newX + maxX >= Game.BoardWidth or newY - maxY < 0 or newY - minY >= Game.BoardHeight:
+            return True
+
+        rows = self.rows
+        left = newX + minX
+
+        for dy, mask in piece.rowMasks:
+            if rows[newY - dy] & (mask << left):
+                return True
+
+        return False
+
+    def tryMove(self, newPiece, newX, newY):
+
+        if self.collides(newPiece, newX, newY):
+            return False
+
+        self.curPiece = newPiece
+        self.curX = newX
+        self.curY = newY
+
+        return True
+
+
+class Scheduler(object):
+
+    # Связывает игру с реальным временем. Прошедшее время берётся из монотонных часов и копится,
+    # update() прогоняет столько целых кадров, сколько набежало, так что при задержках цикла
+    # событий скорость игры не меняется. Удержание клавиши повторяет действие: первый повтор
+    # через DasFrames кадров, дальше каждые ArrFrames. Всё считается в кадрах игры, поэтому
+    # повторы попадают в запись партии как обычные действия
+
+    DasFrames = 10
+    ArrFrames = 2
+    Repeatable = (Action.MoveLeft, Action.MoveRight, Action.OneLineDown)
+    # После долгой остановки (сон системы, отладчик) не догоняем больше этого
+    MaxCatchUp = 15
+
+    def __init__(self, game, clock=time.monotonic):
+
+        self.game = game
+        self.clock = clock
+        self.reset()
+
+
+    def reset(self):
+
+        self.last = self.clock()
+        self.elapsed = 0.0
+        self.held = None
+        self.heldFrames = 0
+
+
+    def press(self, action):
+
+        self.game.handle(action)
+
+        if action in Scheduler.Repeatable:
+            self.held = action
+            self.heldFrames = 0
+
+
+    def release(self, action):
+
+        if self.held == action:
+            self.held = None
+
+
+    def update(self):
+
+        now = self.clock()
+        self.elapsed += now - self.last
+        self.last = now
+
+        frames = int(self.elapsed * Game.FrameRate)
+
+        if frames > Scheduler.MaxCatchUp:
+            frames = Scheduler.MaxCatchUp
+            self.elapsed = 0.0
+        else:
+            self.elapsed -= frames / Game.FrameRate
+
+        for i in range(frames):
+            self.frame()
+
+        return frames
+
+    def frame(self):
+
+        if self.held is not None:
+            self.heldFrames += 1
+            repeat = self.heldFrames - Scheduler.DasFrames
+
+            if repeat >= 0 and repeat % Scheduler.ArrFrames == 0:
+                self.game.handle(self.held)
+
+        self.game.tick()
+
+
+class Replay(object):
+
+    # Прогоняет запись без окна с максимальной скоростью. По пути каждые snapshotEvery тактов
+    # сохраняется состояние игры, так что seek() к любому такту начинает с ближайшего снимка
+
+    def __init__(self, recording, snapshotEvery=Game.FrameRate * 10):
+
+        self.recording = recording
+        self.snapshotEvery = snapshotEvery
+        self.snapshots = []
+        self.snapshotTicks = []
+        self.game = Game()
+
+
+    def seek(self, tick):
+
+        game = self.game
+        i = bisect.bisect_right(self.snapshotTicks, tick) - 1
+
+        if i >= 0:
+            index, state = self.snapshots[i]
+            game.restore(state)
+
+        else:
+            game.start(self.recording.seed)
+            index = 0
+
+        game.recording = None
+        events = self.recording.events
+
+        while True:
+
+            while index < len(events) and events[index][0] <= game.ticks:
+                game.handle(events[index][1])
+                index += 1
+
+            if game.ticks >= tick or not game.isStarted:
+                return game
+
+            if game.ticks % self.snapshotEvery == 0 and (not self.snapshotTicks or game.ticks > self.snapshotTicks[-1]):
+                self.snapshotTicks.append(game.ticks)
+                self.snapshots.append((index, game.snapshot()))
+
+            game.tick()
+
+    def run(self):
+        return self.seek(self.recording.ticks)
+
+    def verify(self):
+
+        game = self.run()
+
+        return (game.ticks == self.recording.ticks and game.numLinesRemoved == self.recording.lines
+                and game.numPieces == self.recording.pieces)
+
+
+def main():
+
+    import sys
+
+    if len(sys.argv) < 2:
+        print("usage: TetrisEngine.py RECORDING [TICK]")
+        return 2
+
+    replay = Replay(Recording.load(sys.argv[1]))
+    start = time.perf_counter()
+
+    if len(sys.argv) > 2:
+        game = replay.seek(int(sys.argv[2]))
+        ok = True
+    else:
+        ok = replay.verify()
+        game = replay.game
+
+    elapsed = time.perf_counter() - start
+    print("tick %d, lines %d, pieces %d, %.1f ms%s" % (game.ticks, game.numLinesRemoved, game.numPieces,
+                                                      elapsed * 1000, "" if ok else ", MISMATCH"))
+
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
\ No newline at end of file
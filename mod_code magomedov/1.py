@@ -1,99 +1,12 @@
-import json
-import os
-
-class Employee:
-    def __init__(self, id, name, position, department, salary, phone, email):
-        self.id = id
-        self.name = name
-        self.position = position
-        self.department = department
-        self.salary = salary
-        self.phone = phone
-        self.email = email
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'position': self.position,  # Исправлено: было 'positio1n'
-            'department': self.department,
-            'salary': self.salary,
-            'phone': self.phone,
-            'email': self.email
-        }
-
-class InformationSystem:
-    def __init__(self, file_name='employees.json'):
-        self.file_name = file_name
-        self.employees = []
-        self.load_data()
-
-    def load_data(self):
-        if os.path.exists(self.file_name):
-            try:
-                with open(self.file_name, 'r') as file:
-                    data = json.load(file)
-                    self.employees = [Employee(**item) for item in data]
-            except (json.JSONDecodeError, Exception) as e:
-                print(f"Ошибка загрузки данных: {e}")
-                self.employees = []
-
-    def save_data(self):
-        try:
-            with open(self.file_name, 'w') as file:
-                json.dump([emp.to_dict() for emp in self.employees], file, indent=4)
-        except Exception as e:
-            print(f"Ошибка сохранения данных: {e}")
-
-    def add_employee(self, employee):
-        # Проверка на уникальность ID
-        if self.get_employee(employee.id):
-            print(f"Сотрудник с ID {employee.id} уже существует!")
-            return False
-        self.employees.append(employee)
-        self.save_data()
-        return True
-
-    def get_employee(self, id):
-        for emp in self.employees:
-            if emp.id == id:
-                return emp
-        return None
-
-    def update_employee(self, id, new_data):
-        employee = self.get_employee(id)
-        if employee:
-            for key, value in new_data.items():
-                setattr(employee, key, value)
-            self.save_data()
-            return True
-        return False
-
-    def delete_employee(self, id):
-        employee = self.get_employee(id)
-        if employee:
-            self.employees.remove(employee)
-            self.save_data()
-            return True
-        return False
-
-    def list_employees(self):
-        return self.employees
-
-    def search_employees(self, **kwargs):
-        results = []
-        for emp in self.employees:
-            match = True
-            for key, value in kwargs.items():
-                if value and getattr(emp, key, None) != value:
-                    match = False
-                    break
-            if match:
-                results.append(emp)
-        return results
+from info_system import Employee, InformationSystem, StorageBusy
 
 def main():
-    system = InformationSystem()
+    try:
+        system = InformationSystem()
+    except StorageBusy as e:
+        print(e)
+        return
+
     
     while True:
         print("\nИнформационная система сотрудников")
@@ -102,9 +15,13 @@ def main():
         print("3. Найти сотрудника")
         print("4. Обновить данные сотрудника")
         print("5. Удалить сотрудника")
-        print("6. Выход")
+        print("6. Импорт из CSV/JSONL")
+        print("7. Экспорт в CSV/JSONL")
+        print("8. Выход")
         
         choice = input("Выберите действие: ")
+        # Подхватываем изменения, внесённые другими копиями программы
+        system.refresh()
         
         if choice == '1':
             print("\nДобавление нового сотрудника")
@@ -135,12 +52,23 @@ def main():
             
         elif choice == '2':
             print("\nСписок всех сотрудников:")
-            employees = system.list_employees()
-            if employees:
-                for emp in employees:
-                    print(f"ID: {emp.id}, Имя: {emp.name}, Должность: {emp.position}, Отдел: {emp.department}, Зарплата: {emp.salary}, Телефон: {emp.phone}, Электронная почта: {emp.email}")
-            else:
+            if not system.list_employees():
                 print("Нет сотрудников в системе.")
+                continue
+            sort = input("Сортировать по (id, name, salary; Enter — id): ").strip() or 'id'
+            if sort not in ('id', 'name', 'salary'):
+                print("Неизвестное поле, сортировка по id.")
+                sort = 'id'
+            # Выводим постранично, следующая страница берётся по курсору
+            cursor = None
+            while True:
+                page, cursor = system.list_page(sort, after=cursor, limit=20)
+                for emp in page:
+                    print(f"ID: {emp.id}, Имя: {emp.name}, Должность: {emp.position}, Отдел: {emp.department}, Зарплата: {emp.salary}, Телефон: {emp.phone}, Электронная почта: {emp.email}")
+                if cursor is None:
+                    break
+                if input("Enter — следующая страница, q — назад в меню: ").strip().lower() == 'q':
+                    break
                 
         elif choice == '3':
             print("\nПоиск сотрудника")
@@ -210,11 +138,37 @@ def main():
                 print("Сотрудник с таким ID не найден.")
                 
         elif choice == '6':
+            print("\nИмпорт сотрудников")
+            file_name = input("Файл (.csv или .jsonl): ")
+            try:
+                added, errors = system.import_file(file_name)
+            except (OSError, ValueError) as e:
+                print(f"Ошибка импорта: {e}")
+                continue
+            if errors:
+                print("Импорт отменён, найдены ошибки:")
+                for error in errors[:20]:
+                    print(f"  {error}")
+                if len(errors) > 20:
+                    print(f"  ... и ещё {len(errors) - 20}")
+            else:
+                print(f"Импортировано сотрудников: {added}")
+                
+        elif choice == '7':
+            print("\nЭкспорт сотрудников")
+            file_name = input("Файл (.csv или .jsonl): ")
+            try:
+                system.export_file(file_name)
+                print("Данные успешно выгружены!")
+            except (OSError, ValueError) as e:
+                print(f"Ошибка экспорта: {e}")
+                
+        elif choice == '8':
             print("Выход из системы...")
             break
             
         else:
-            print("Неверный ввод. Пожалуйста, выберите действие от 1 до 6.")
+            print("Неверный ввод. Пожалуйста, выберите действие от 1 до 8.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,130 @@
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import concurrent.futures
+from info_system import Employee, InformationSystem
+try:
+    import resource
+except ImportError:
+    # На Windows модуля resource нет, пиковая память не измеряется
+    resource = None
+DEPARTMENTS = ['Бухгалтерия', 'Разработка', 'Продажи', 'Склад', 'Кадры', 'Юристы', 'Поддержка', 'Логистика']
+POSITIONS = ['Стажёр', 'Специалист', 'Ведущий специалист', 'Руководитель', 'Директор']
+NAMES = ['Иванов', 'Петров', 'Сидоров', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Соколов', 'Михайлов']
+def make_employee(rng, id):
+    return Employee(str(id), f"{rng.choice(NAMES)} {id}", rng.choice(POSITIONS), rng.choice(DEPARTMENTS),
+                    float(rng.randrange(20000, 300000, 500)), f"8900{id:07d}", f"user{id}@example.com")
+def peak_rss_kb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS отдаёт байты, Linux — килобайты
+    return rss // 1024 if sys.platform == 'darwin' else rss
+def percentile(samples, p):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))]
+def summarize(name, samples, count=None):
+    # samples — длительности отдельных вызовов в секундах
+    total = sum(samples)
+    count = len(samples) if count is None else count
+    return {
+        'operation': name,
+        'count': count,
+        'total_s': round(total, 6),
+        'ops_per_s': round(count / total, 1) if total else None,
+        'p50_ms': round(percentile(samples, 50) * 1000, 4),
+        'p95_ms': round(percentile(samples, 95) * 1000, 4),
+        'p99_ms': round(percentile(samples, 99) * 1000, 4),
+    }
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+def run_size(size, ops, backend, seed):
+    rng = random.Random(seed)
+    suffix = '.db' if backend == 'sqlite' else '.json'
+    with tempfile.TemporaryDirectory() as workdir:
+        file_name = os.path.join(workdir, 'employees' + suffix)
+        seed_system = InformationSystem(file_name, autoload=False)
+        seed_system.employees = [make_employee(rng, i) for i in range(size)]
+        seed_system.save_data()
+        del seed_system
+        results = []
+        elapsed, system = timed(InformationSystem, file_name)
+        results.append(summarize('load_data', [elapsed], 1))
+        results.append(summarize('save_data', [timed(system.save_data)[0]], 1))
+        ids = [str(rng.randrange(size)) for _ in range(ops)]
+        results.append(summarize('get_employee', [timed(system.get_employee, id)[0] for id in ids]))
+        # Без кэша — чтобы мерить сам поиск, а не попадание в LRU
+        system.cache_size = 0
+        results.append(summarize('search_department', [
+            timed(system.search_employees, department=rng.choice(DEPARTMENTS))[0] for _ in range(min(ops, 200))]))
+        results.append(summarize('search_department_position', [
+            timed(system.search_employees, department=rng.choice(DEPARTMENTS), position=rng.choice(POSITIONS))[0]
+            for _ in range(min(ops, 200))]))
+        results.append(summarize('search_salary_range', [
+            timed(system.search_employees, min_salary=lo, max_salary=lo + 1000)[0]
+            for lo in (rng.randrange(20000, 300000) for _ in range(min(ops, 200)))]))
+        results.append(summarize('search_name_contains', [
+            timed(system.search_employees, name_contains=str(rng.randrange(size)))[0] for _ in range(min(ops, 200))]))
+        system.cache_size = 128
+        department = DEPARTMENTS[0]
+        system.search_employees(department=department)
+        results.append(summarize('search_cached', [
+            timed(system.search_employees, department=department)[0] for _ in range(ops)]))
+        new_ids = range(size, size + ops)
+        results.append(summarize('add_employee', [
+            timed(system.add_employee, make_employee(rng, id))[0] for id in new_ids]))
+        results.append(summarize('update_employee', [
+            timed(system.update_employee, str(id), {'salary': 1000.0})[0] for id in new_ids]))
+        results.append(summarize('delete_employee', [
+            timed(system.delete_employee, str(id))[0] for id in new_ids]))
+        bulk = [make_employee(rng, id) for id in new_ids]
+        results.append(summarize('add_many', [timed(system.add_many, bulk)[0]], ops))
+        results.append(summarize('update_many', [
+            timed(system.update_many, {str(id): {'department': department} for id in new_ids})[0]], ops))
+        results.append(summarize('delete_many', [timed(system.delete_many, [str(id) for id in new_ids])[0]], ops))
+        file_size = os.path.getsize(file_name)
+    return {
+        'size': size,
+        'backend': backend,
+        'file_bytes': file_size,
+        'peak_rss_kb': peak_rss_kb(),
+        'results': results,
+    }
+def main():
+    parser = argparse.ArgumentParser(description="Замеры InformationSystem: загрузка, запись, поиск и изменения")
+    parser.add_argument('--sizes', default='1000,10000,100000,1000000',
+                        help="размеры наборов данных через запятую")
+    parser.add_argument('--ops', type=int, default=1000, help="число одиночных операций на замер")
+    parser.add_argument('--backend', choices=['json', 'sqlite'], default='json')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="файл для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args()
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'runs': [],
+    }
+    for size in (int(size) for size in args.sizes.split(',')):
+        # Каждый размер — в отдельном процессе, чтобы пиковая память не копилась между замерами
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+            run = executor.submit(run_size, size, args.ops, args.backend, args.seed).result()
+        report['runs'].append(run)
+        print(f"{size}: готово", file=sys.stderr)
+    text = json.dumps(report, indent=4, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text)
+    else:
+        print(text)
+if __name__ == "__main__":
+    main()
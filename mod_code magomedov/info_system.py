@@ -0,0 +1,1040 @@
+import sys
+import json
+import bisect
+import math
+import contextlib
+import collections
+import csv
+import itertools
+import concurrent.futures
+import re
+import sqlite3
+import threading
+try:
+    import fcntl
+except ImportError:
+    # Windows: блокировка файла через msvcrt
+    fcntl = None
+    import msvcrt
+import os
+class Employee:
+    # Без __dict__ на каждый объект: на миллионе записей это основная часть памяти
+    __slots__ = ('id', 'name', 'position', 'department', 'salary', 'phone', 'email')
+    def __init__(self, id, name, position, department, salary, phone, email):
+        self.id = id
+        self.name = name
+        self.position = _intern(position)
+        self.department = _intern(department)
+        self.salary = salary
+        self.phone = phone
+        self.email = email
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'position': self.position, 
+            'department': self.department,
+            'salary': self.salary,
+            'phone': self.phone,
+            'email': self.email
+        }
+    def to_json(self):
+        # Запись в том же виде, что json.dump(..., indent=4) внутри списка, но без промежуточного dict
+        return _RECORD_TEMPLATE % (
+            json.dumps(self.id), json.dumps(self.name), json.dumps(self.position),
+            json.dumps(self.department), json.dumps(self.salary), json.dumps(self.phone),
+            json.dumps(self.email))
+    @classmethod
+    def from_dict(cls, data):
+        # Быстрый путь для загрузки: позиционный вызов вместо разбора Employee(**data)
+        return cls(data['id'], data['name'], data['position'], data['department'],
+                   data['salary'], data['phone'], data['email'])
+_RECORD_TEMPLATE = (
+    '    {\n'
+    '        "id": %s,\n'
+    '        "name": %s,\n'
+    '        "position": %s,\n'
+    '        "department": %s,\n'
+    '        "salary": %s,\n'
+    '        "phone": %s,\n'
+    '        "email": %s\n'
+    '    }')
+def _intern(value):
+    # Отделы и должности повторяются у тысяч сотрудников — храним одну копию строки
+    return sys.intern(value) if isinstance(value, str) else value
+def _normalize(employee):
+    # Запись из старого или исправленного вручную файла: индексы сравнивают ID и имена как строки,
+    # а сводки складывают зарплаты. Приводим по правилам импорта, негодную зарплату считаем нулём
+    if type(employee.salary) is not float:
+        try:
+            employee.salary = coerce_field('salary', employee.salary)
+        except ValueError:
+            print(f"Некорректная зарплата у сотрудника {employee.id}: {employee.salary!r}, принята равной 0")
+            employee.salary = 0.0
+    if type(employee.id) is not str:
+        employee.id = coerce_field('id', employee.id)
+    if type(employee.name) is not str:
+        employee.name = coerce_field('name', employee.name)
+def _trigrams(text):
+    text = str(text).lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+class OperationCancelled(Exception):
+    pass
+class StorageBusy(Exception):
+    # Файл данных обслуживает сервер (или, для сервера, его уже открыли другие программы)
+    pass
+_SEPARATORS = re.compile(r'[\s,]*')
+def iter_records(file_name, chunk_size=1 << 16, progress=None):
+    # Потоковый разбор JSON-массива: записи читаются по одной, файл целиком в память не грузится
+    decoder = json.JSONDecoder()
+    total = os.path.getsize(file_name)
+    done = 0
+    with open(file_name, 'r') as file:
+        buffer = file.read(chunk_size)
+        done += len(buffer)
+        eof = not buffer
+        pos = _SEPARATORS.match(buffer).end()
+        if not buffer.startswith('[', pos):
+            raise ValueError("Ожидался JSON-массив сотрудников")
+        pos += 1
+        while True:
+            pos = _SEPARATORS.match(buffer, pos).end()
+            if buffer.startswith(']', pos):
+                break
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = file.read(chunk_size)
+                eof = not chunk
+                done += len(chunk)
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                if progress:
+                    progress(min(done, total), total)
+                continue
+            yield item
+    if progress:
+        progress(total, total)
+def bulk_format(file_name, fmt=None):
+    fmt = fmt or os.path.splitext(file_name)[1].lstrip('.').lower()
+    if fmt not in ('csv', 'jsonl'):
+        raise ValueError(f"Неизвестный формат файла: {fmt}")
+    return fmt
+def read_chunks(file_name, fmt=None, chunk_size=10000):
+    # Отдаёт пары (номер первой строки, список записей) — файл целиком в память не читается
+    fmt = bulk_format(file_name, fmt)
+    with open(file_name, 'r', encoding='utf-8', newline='') as file:
+        if fmt == 'csv':
+            rows = csv.DictReader(file)
+            line = 2
+        else:
+            rows = (json.loads(text) for text in file if text.strip())
+            line = 1
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            yield line, chunk
+            line += len(chunk)
+def coerce_field(field, value):
+    # Зарплата — число (допускаются пробелы и запятая), остальные поля — строки.
+    # При некорректной зарплате выбрасывает ValueError
+    if field == 'salary':
+        return float(str(value).replace(' ', '').replace(',', '.')) if value not in (None, '') else 0.0
+    if field == 'id':
+        return str(value or '').strip()
+    return str(value or '')
+def validate_rows(line, rows):
+    # Выполняется в рабочих процессах: приводит типы и собирает ошибки с номерами строк
+    valid, errors = [], []
+    for number, row in enumerate(rows, line):
+        id = coerce_field('id', row.get('id'))
+        if not id:
+            errors.append(f"строка {number}: пустой ID")
+            continue
+        salary = row.get('salary')
+        try:
+            salary = coerce_field('salary', salary)
+        except ValueError:
+            errors.append(f"строка {number}: некорректная зарплата {salary!r}")
+            continue
+        record = {field: salary if field == 'salary' else coerce_field(field, row.get(field))
+                  for field in Employee.__slots__}
+        valid.append((number, record))
+    return valid, errors
+def validated_chunks(file_name, fmt=None, chunk_size=10000, workers=None):
+    # Проверка идёт параллельно, но в памяти одновременно не больше нескольких блоков
+    chunks = read_chunks(file_name, fmt, chunk_size)
+    if workers == 0:
+        for line, rows in chunks:
+            yield validate_rows(line, rows)
+        return
+    limit = 2 * (workers or os.cpu_count() or 1)
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        window = collections.deque()
+        for line, rows in chunks:
+            window.append(executor.submit(validate_rows, line, rows))
+            if len(window) > limit:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+class FileLock:
+    # Межпроцессная блокировка через отдельный файл; повторный вход в том же процессе разрешён
+    def __init__(self, path):
+        self.path = path
+        self._mutex = threading.RLock()
+        self._depth = 0
+        self._file = None
+    def __enter__(self):
+        self._mutex.acquire()
+        if self._depth == 0:
+            self._file = open(self.path, 'a+b')
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+        self._depth += 1
+        return self
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            self._file.close()
+            self._file = None
+        self._mutex.release()
+class OwnerLock:
+    # Блокировка на всё время работы процесса. Программы, открывающие файл напрямую, берут её
+    # совместно, сервер — монопольно: сервер не запустится поверх открытых копий, а они — поверх сервера.
+    # В Windows совместной блокировки нет, там открытая копия только проверяет, что сервер не запущен
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+    def acquire(self, exclusive):
+        file = open(self.path, 'a+b')
+        try:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+                if not exclusive:
+                    file.seek(0)
+                    msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+        except OSError:
+            file.close()
+            return False
+        self._file = file
+        return True
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+class JsonStorage:
+    # Снимок в JSON (совместимый со старым форматом) плюс журнал изменений.
+    # Каждая операция дописывается строкой JSON, снимок перезаписывается только при уплотнении
+    def __init__(self, file_name, journal=True, compact_every=1000):
+        self.file_name = file_name
+        self.journal = journal
+        self.log_name = file_name + '.log'
+        self.compact_every = compact_every
+        self.lock = FileLock(file_name + '.lock')
+        self._log_entries = 0
+        # Что уже прочитано: версия снимка (mtime, размер, inode) и позиция в журнале
+        self._snapshot_stamp = None
+        self._log_offset = 0
+    def _stamp(self):
+        try:
+            st = os.stat(self.file_name)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+    def load(self, progress=None):
+        # Версию снимка запоминает replay: load читает файл и для get, не сбивая refresh
+        if not os.path.exists(self.file_name):
+            return
+        for item in iter_records(self.file_name, progress=progress):
+            yield Employee.from_dict(item)
+    def replay(self):
+        # Вызывается под блокировкой сразу после load, так что снимок за это время не сменится
+        self._snapshot_stamp = self._stamp()
+        self._log_entries = 0
+        self._log_offset = 0
+        return self._read_log()
+    def _iter_log(self, offset=0):
+        # Пары (длина строки, запись) начиная с offset
+        if not self.journal or not os.path.exists(self.log_name):
+            return
+        with open(self.log_name, 'rb') as file:
+            file.seek(offset)
+            for line in file:
+                if not line.endswith(b'\n'):
+                    # Недописанная последняя строка после сбоя — дальше журнала нет
+                    break
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                yield len(line), entry
+    def _read_log(self):
+        for size, entry in self._iter_log(self._log_offset):
+            self._log_offset += size
+            self._log_entries += 1
+            yield entry
+    def changes(self):
+        # Записи, добавленные другими процессами; None — снимок сменился и нужна полная перезагрузка
+        if self._stamp() != self._snapshot_stamp:
+            return None
+        if not self.journal:
+            return []
+        try:
+            size = os.path.getsize(self.log_name)
+        except OSError:
+            size = 0
+        if size < self._log_offset:
+            return None
+        if size == self._log_offset:
+            return []
+        return list(self._read_log())
+    def pending(self):
+        # Есть ли непрочитанные изменения других процессов; сами записи не читаются
+        if self._stamp() != self._snapshot_stamp:
+            return True
+        return self.journal and os.path.exists(self.log_name) and os.path.getsize(self.log_name) != self._log_offset
+    def save(self, employees):
+        # Снимок пишется во временный файл и атомарно подменяет старый
+        tmp_name = self.file_name + '.tmp'
+        with open(tmp_name, 'w') as file:
+            empty = True
+            for emp in employees:
+                file.write('[\n' if empty else ',\n')
+                file.write(emp.to_json())
+                empty = False
+            file.write('[]' if empty else '\n]')
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_name, self.file_name)
+        if self.journal:
+            # Если упасть до очистки журнала, его повторное применение к новому снимку безвредно
+            open(self.log_name, 'w').close()
+            self._log_entries = 0
+            self._log_offset = 0
+        self._snapshot_stamp = self._stamp()
+    def append(self, entries):
+        # Возвращает True, если пора записать полный снимок
+        if not self.journal:
+            return True
+        data = ''.join(json.dumps(entry) + '\n' for entry in entries).encode('utf-8')
+        with open(self.log_name, 'ab') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        self._log_offset += len(data)
+        self._log_entries += len(entries)
+        return self._log_entries >= self.compact_every
+    def get(self, id):
+        # Снимок плюс журнал. Из снимка берутся только сотрудники, упомянутые в журнале,
+        # поэтому переименования и повторные добавления применяются так же, как при загрузке
+        with self.lock:
+            entries = [entry for size, entry in self._iter_log()]
+            wanted = {id}
+            for entry in entries:
+                if entry['op'] == 'add':
+                    wanted.add(entry['employee']['id'])
+                elif 'id' in entry:
+                    wanted.add(entry['id'])
+                    wanted.add(entry.get('data', {}).get('id', entry['id']))
+            found = {}
+            for employee in self.load():
+                if employee.id in wanted and employee.id not in found:
+                    found[employee.id] = employee
+                    if not entries:
+                        break
+        for entry in entries:
+            op = entry['op']
+            if op == 'add':
+                found.setdefault(entry['employee']['id'], Employee.from_dict(entry['employee']))
+            elif op == 'update':
+                employee = found.get(entry['id'])
+                new_id = entry['data'].get('id', entry['id'])
+                if employee is None or (new_id != entry['id'] and new_id in found):
+                    continue
+                for key, value in entry['data'].items():
+                    if key in Employee.__slots__:
+                        setattr(employee, key, value)
+                found[new_id] = found.pop(entry['id'])
+            elif op == 'delete':
+                found.pop(entry['id'], None)
+        return found.get(id)
+class SqliteStorage:
+    # Двоичное хранилище на стандартном sqlite3: каждая операция — одна транзакция,
+    # отдельный сотрудник читается по первичному ключу без разбора всего файла.
+    # Таблица journal хранит последние операции, чтобы другие процессы подтягивали только их
+    def __init__(self, file_name, keep_journal=10000):
+        self.file_name = file_name
+        self.keep_journal = keep_journal
+        self.lock = FileLock(file_name + '.lock')
+        self.connection = sqlite3.connect(file_name, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA mmap_size=268435456')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS employees ('
+            'id TEXT PRIMARY KEY, name TEXT, position TEXT, department TEXT, '
+            'salary REAL, phone TEXT, email TEXT)')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS journal (seq INTEGER PRIMARY KEY AUTOINCREMENT, entry TEXT)')
+        self.connection.commit()
+        self._seq = 0
+    def _last_seq(self):
+        return self.connection.execute('SELECT COALESCE(MAX(seq), 0) FROM journal').fetchone()[0]
+    def load(self, progress=None):
+        self._seq = self._last_seq()
+        total = self.connection.execute('SELECT COUNT(*) FROM employees').fetchone()[0]
+        cursor = self.connection.execute(
+            'SELECT id, name, position, department, salary, phone, email FROM employees ORDER BY rowid')
+        done = 0
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                break
+            for row in rows:
+                yield Employee(*row)
+            done += len(rows)
+            if progress:
+                progress(done, total)
+    def replay(self):
+        return iter(())
+    def changes(self):
+        rows = self.connection.execute(
+            'SELECT seq, entry FROM journal WHERE seq > ? ORDER BY seq', (self._seq,)).fetchall()
+        if not rows:
+            return []
+        # Пропуск в нумерации — нужные записи уже вычищены, остаётся полная перезагрузка
+        if rows[0][0] != self._seq + 1:
+            return None
+        entries = [json.loads(entry) for _, entry in rows]
+        if any(entry['op'] == 'reload' for entry in entries):
+            return None
+        self._seq = rows[-1][0]
+        return entries
+    def pending(self):
+        return self._last_seq() != self._seq
+    def save(self, employees):
+        with self.connection:
+            self.connection.execute('DELETE FROM employees')
+            self.connection.executemany(
+                'INSERT INTO employees VALUES (?, ?, ?, ?, ?, ?, ?)',
+                ((emp.id, emp.name, emp.position, emp.department, emp.salary, emp.phone, emp.email)
+                 for emp in employees))
+            self.connection.execute('DELETE FROM journal')
+            self._seq = self.connection.execute(
+                'INSERT INTO journal (entry) VALUES (?)', (json.dumps({'op': 'reload'}),)).lastrowid
+    def append(self, entries):
+        with self.connection:
+            for entry in entries:
+                op = entry['op']
+                if op == 'add':
+                    data = entry['employee']
+                    self.connection.execute(
+                        'INSERT OR REPLACE INTO employees VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        tuple(data[field] for field in Employee.__slots__))
+                elif op == 'update':
+                    fields = [field for field in entry['data'] if field in Employee.__slots__]
+                    if fields:
+                        self.connection.execute(
+                            'UPDATE employees SET ' + ', '.join(f'{field} = ?' for field in fields) + ' WHERE id = ?',
+                            [entry['data'][field] for field in fields] + [entry['id']])
+                elif op == 'delete':
+                    self.connection.execute('DELETE FROM employees WHERE id = ?', (entry['id'],))
+                self._seq = self.connection.execute(
+                    'INSERT INTO journal (entry) VALUES (?)', (json.dumps(entry),)).lastrowid
+            self.connection.execute('DELETE FROM journal WHERE seq <= ?', (self._seq - self.keep_journal,))
+        return False
+    def get(self, id):
+        row = self.connection.execute(
+            'SELECT id, name, position, department, salary, phone, email FROM employees WHERE id = ?',
+            (id,)).fetchone()
+        return Employee(*row) if row else None
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+def open_storage(file_name, journal=True, compact_every=1000):
+    if os.path.splitext(file_name)[1].lower() in SQLITE_EXTENSIONS:
+        return SqliteStorage(file_name)
+    return JsonStorage(file_name, journal, compact_every)
+class SalaryStats:
+    # Накопитель по группе сотрудников: сумма и количество обновляются за O(1),
+    # отсортированный список зарплат нужен для медианы и перцентилей
+    __slots__ = ('count', 'total', 'salaries')
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.salaries = []
+    def add(self, salary):
+        self.count += 1
+        self.total += salary
+        bisect.insort(self.salaries, salary)
+    def remove(self, salary):
+        self.count -= 1
+        self.total -= salary
+        pos = bisect.bisect_left(self.salaries, salary)
+        if pos < len(self.salaries) and self.salaries[pos] == salary:
+            del self.salaries[pos]
+    def average(self):
+        return self.total / self.count if self.count else 0.0
+    def percentile(self, p):
+        if not self.salaries:
+            return None
+        # Линейная интерполяция между соседними значениями
+        rank = (len(self.salaries) - 1) * p / 100
+        lo = int(rank)
+        hi = min(lo + 1, len(self.salaries) - 1)
+        return self.salaries[lo] + (self.salaries[hi] - self.salaries[lo]) * (rank - lo)
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'average': self.average(),
+            'min': self.salaries[0] if self.salaries else None,
+            'max': self.salaries[-1] if self.salaries else None,
+            'median': self.percentile(50)
+        }
+# Поля, по которым поддерживаются вторичные индексы по умолчанию
+INDEXED_FIELDS = ('department', 'position', 'name')
+# Поля, по которым ведутся сводные показатели по зарплатам
+AGGREGATE_FIELDS = ('department', 'position')
+# Поля, по которым можно сортировать постраничный вывод
+ORDER_FIELDS = ('id', 'name', 'salary')
+class InformationSystem:
+    def __init__(self, file_name='employees.json', indexed_fields=INDEXED_FIELDS, journal=True, compact_every=1000,
+                 storage=None, autoload=True, auto_compact=True):
+        self.file_name = file_name
+        # Файл, открытый напрямую, не должен обслуживать сервер: его снимки затёрли бы наш журнал
+        self.owner = None
+        if storage is None:
+            self.owner = OwnerLock(file_name + '.owner')
+            if not self.owner.acquire(exclusive=False):
+                raise StorageBusy(f"Файл {file_name} обслуживает сервер, работайте через него (EmployeeClient)")
+        # Хранилище выбирается по расширению файла, если не передано явно
+        self.storage = storage if storage is not None else open_storage(file_name, journal, compact_every)
+        # Незавершённый пакет: записи для журнала и функции отката
+        self._batch = None
+        self._undo = None
+        self.employees = []
+        # ID -> позиция сотрудника в self.employees
+        self._positions = {}
+        # поле -> {значение -> множество ID}
+        self._indexes = {field: {} for field in indexed_fields}
+        # поле -> отсортированный список пар (значение, id): постраничный вывод
+        # и запросы по диапазону зарплат без сортировки всего списка
+        self._orders = {field: [] for field in ORDER_FIELDS}
+        # триграмма имени в нижнем регистре -> множество ID, для поиска по части имени
+        self._name_grams = {}
+        # поле -> {значение -> SalaryStats}; ключ None — все сотрудники
+        self._groups = {field: {} for field in AGGREGATE_FIELDS}
+        self._totals = SalaryStats()
+        # LRU-кэш результатов поиска, сбрасывается при любом изменении данных
+        self._cache = collections.OrderedDict()
+        self.cache_size = 128
+        # При auto_compact=False снимок не пишется сам: вызывающий код видит compaction_due
+        # и вызывает save_data, когда ему удобно (например, в фоновом потоке)
+        self.auto_compact = auto_compact
+        self.compaction_due = False
+        if autoload:
+            self.load_data()
+    def load_data(self, progress=None):
+        with self.storage.lock:
+            employees = []
+            positions = {}
+            try:
+                for employee in self.storage.load(progress):
+                    _normalize(employee)
+                    if employee.id not in positions:
+                        positions[employee.id] = len(employees)
+                        employees.append(employee)
+                self.employees = employees
+                self._positions = positions
+            except OperationCancelled:
+                # Прерванная загрузка не трогает уже загруженные данные
+                raise
+            except (json.JSONDecodeError, Exception) as e:
+                print(f"Ошибка загрузки данных: {e}")
+                self.employees = []
+                self._positions = {}
+            self._rebuild_indexes()
+            try:
+                for entry in self.storage.replay():
+                    self._apply(entry)
+            except Exception as e:
+                print(f"Ошибка чтения журнала: {e}")
+    def refresh(self, reload=True):
+        # Подтягивает изменения других процессов; обычно это только новые записи журнала.
+        # При reload=False полная перезагрузка не выполняется: возвращается None,
+        # и вызывающий код сам запускает load_data (например, в фоновом потоке)
+        with self.storage.lock:
+            try:
+                entries = self.storage.changes()
+            except Exception as e:
+                print(f"Ошибка чтения журнала: {e}")
+                return False
+            if entries is None:
+                if not reload:
+                    return None
+                self.load_data()
+                return True
+            for entry in entries:
+                self._apply(entry)
+            return bool(entries)
+    def save_data(self):
+        with self.storage.lock:
+            # Снимок не должен затереть то, что успели записать другие процессы
+            self.refresh()
+            self.save_snapshot()
+    def save_snapshot(self):
+        # Пишет снимок, не меняя данных в памяти, — годится для фонового потока, пока интерфейс
+        # читает тот же список. Если другие процессы успели что-то записать, снимок не пишется
+        # и возвращается False: сначала нужен refresh
+        with self.storage.lock:
+            if self.storage.pending():
+                return False
+            try:
+                self.storage.save(self.employees)
+                self.compaction_due = False
+            except Exception as e:
+                print(f"Ошибка сохранения данных: {e}")
+            return True
+    def _persist(self, entries):
+        try:
+            compact = self.storage.append(entries)
+        except Exception as e:
+            print(f"Ошибка записи журнала: {e}")
+            return
+        if compact:
+            if self.auto_compact:
+                self.save_data()
+            else:
+                self.compaction_due = True
+    def import_file(self, file_name, fmt=None, chunk_size=10000, workers=None):
+        # Импорт CSV/JSONL одной транзакцией: при любой ошибке ничего не меняется.
+        # Возвращает (число добавленных, список ошибок)
+        errors = []
+        added = 0
+        try:
+            with self.batch():
+                # Записи только дописываются в список, индексы строятся один раз в конце:
+                # пошаговое индексирование (insort в упорядоченные списки) на больших файлах — O(n²)
+                start = len(self.employees)
+                self._undo.append(lambda: self._truncate(start))
+                for valid, bad in validated_chunks(file_name, fmt, chunk_size, workers):
+                    errors.extend(bad)
+                    for number, record in valid:
+                        if record['id'] in self._positions:
+                            errors.append(f"строка {number}: сотрудник с ID {record['id']} уже существует")
+                        elif not errors:
+                            employee = Employee.from_dict(record)
+                            self._positions[employee.id] = len(self.employees)
+                            self.employees.append(employee)
+                            self._batch.append({'op': 'add', 'employee': employee.to_dict()})
+                            added += 1
+                if errors:
+                    raise ValueError(errors[0])
+                if added:
+                    self._rebuild_indexes()
+        except ValueError:
+            # Битый файл (например, некорректный JSON) — не ошибка в данных, пробрасываем дальше
+            if not errors:
+                raise
+            return 0, errors
+        return added, errors
+    def export_file(self, file_name, fmt=None, chunk_size=10000):
+        fmt = bulk_format(file_name, fmt)
+        tmp_name = file_name + '.tmp'
+        with open(tmp_name, 'w', encoding='utf-8', newline='') as file:
+            if fmt == 'csv':
+                writer = csv.writer(file)
+                writer.writerow(Employee.__slots__)
+                for start in range(0, len(self.employees), chunk_size):
+                    writer.writerows([getattr(emp, field) for field in Employee.__slots__]
+                                     for emp in self.employees[start:start + chunk_size])
+            else:
+                for start in range(0, len(self.employees), chunk_size):
+                    file.write(''.join(json.dumps(emp.to_dict(), ensure_ascii=False) + '\n'
+                                       for emp in self.employees[start:start + chunk_size]))
+        os.replace(tmp_name, file_name)
+    def import_json(self, file_name):
+        return self.add_many(Employee.from_dict(item) for item in iter_records(file_name))
+    def export_json(self, file_name):
+        JsonStorage(file_name, journal=False).save(self.employees)
+    def add_index(self, field):
+        if field in self._indexes:
+            return
+        index = self._indexes[field] = {}
+        for emp in self.employees:
+            index.setdefault(getattr(emp, field, None), set()).add(emp.id)
+    def _rebuild_indexes(self):
+        self._cache.clear()
+        for field in self._indexes:
+            self._indexes[field] = {}
+        self._orders = {field: [] for field in self._orders}
+        self._name_grams = {}
+        self._groups = {field: {} for field in self._groups}
+        self._totals = SalaryStats()
+        for emp in self.employees:
+            # Зарплаты дописываются в конец и сортируются один раз ниже: insort на каждую запись — O(n²)
+            for stats in self._group_stats(emp, create=True):
+                stats.count += 1
+                stats.total += emp.salary
+                stats.salaries.append(emp.salary)
+            for field, index in self._indexes.items():
+                index.setdefault(getattr(emp, field, None), set()).add(emp.id)
+            for field, order in self._orders.items():
+                order.append((getattr(emp, field), emp.id))
+            for gram in _trigrams(emp.name):
+                self._name_grams.setdefault(gram, set()).add(emp.id)
+        for order in self._orders.values():
+            order.sort()
+        self._totals.salaries.sort()
+        for groups in self._groups.values():
+            for stats in groups.values():
+                stats.salaries.sort()
+    def _index_employee(self, employee):
+        self._cache.clear()
+        for field, index in self._indexes.items():
+            index.setdefault(getattr(employee, field, None), set()).add(employee.id)
+        for field, order in self._orders.items():
+            bisect.insort(order, (getattr(employee, field), employee.id))
+        self._aggregate(employee, 1)
+        for gram in _trigrams(employee.name):
+            self._name_grams.setdefault(gram, set()).add(employee.id)
+    def _unindex_employee(self, employee):
+        self._cache.clear()
+        self._aggregate(employee, -1)
+        for gram in _trigrams(employee.name):
+            ids = self._name_grams.get(gram)
+            if ids is not None:
+                ids.discard(employee.id)
+                if not ids:
+                    del self._name_grams[gram]
+        for field, index in self._indexes.items():
+            value = getattr(employee, field, None)
+            ids = index.get(value)
+            if ids is not None:
+                ids.discard(employee.id)
+                if not ids:
+                    del index[value]
+        for field, order in self._orders.items():
+            key = (getattr(employee, field), employee.id)
+            pos = bisect.bisect_left(order, key)
+            if pos < len(order) and order[pos] == key:
+                del order[pos]
+    def _aggregate(self, employee, sign):
+        for stats in self._group_stats(employee, create=sign > 0):
+            if sign > 0:
+                stats.add(employee.salary)
+            else:
+                stats.remove(employee.salary)
+        if sign < 0:
+            for field, groups in self._groups.items():
+                value = getattr(employee, field, None)
+                if value in groups and not groups[value].count:
+                    del groups[value]
+    def _group_stats(self, employee, create):
+        yield self._totals
+        for field, groups in self._groups.items():
+            value = getattr(employee, field, None)
+            stats = groups.get(value)
+            if stats is None and create:
+                stats = groups[value] = SalaryStats()
+            if stats is not None:
+                yield stats
+    def salary_report(self, by='department'):
+        # Сводка по группам: количество, сумма, среднее, минимум, максимум, медиана
+        if by is None:
+            return self._totals.to_dict()
+        return {value: stats.to_dict() for value, stats in self._groups[by].items()}
+    def salary_percentile(self, p, by=None, value=None):
+        stats = self._totals if by is None else self._groups[by].get(value)
+        return stats.percentile(p) if stats else None
+    def headcount(self, by='department'):
+        return {value: stats.count for value, stats in self._groups[by].items()}
+    def _apply(self, entry):
+        op = entry['op']
+        if op == 'add':
+            return self._add(Employee.from_dict(entry['employee']))
+        if op == 'update':
+            return self._update(entry['id'], entry['data'])
+        if op == 'delete':
+            return self._delete(entry['id'])
+        return False
+    def _add(self, employee):
+        if employee.id in self._positions:
+            return False
+        self._positions[employee.id] = len(self.employees)
+        self.employees.append(employee)
+        try:
+            self._index_employee(employee)
+        except BaseException:
+            # Значение неподходящего типа (например, зарплата строкой) оставило индексы
+            # заполненными наполовину: убираем сотрудника и строим индексы заново
+            self.employees.pop()
+            del self._positions[employee.id]
+            self._rebuild_indexes()
+            raise
+        return True
+    def _update(self, id, new_data):
+        employee = self.get_employee(id)
+        if not employee:
+            return False
+        if any(key not in Employee.__slots__ for key in new_data):
+            return False
+        new_id = new_data.get('id', id)
+        if new_id != id and new_id in self._positions:
+            return False
+        old_data = {key: getattr(employee, key) for key in new_data}
+        self._unindex_employee(employee)
+        for key, value in new_data.items():
+            setattr(employee, key, _intern(value) if key in ('position', 'department') else value)
+        if new_id != id:
+            self._positions[new_id] = self._positions.pop(id)
+        try:
+            self._index_employee(employee)
+        except BaseException:
+            # Возвращаем прежние значения и перестраиваем индексы, как в _add
+            for key, value in old_data.items():
+                setattr(employee, key, value)
+            if new_id != id:
+                self._positions[id] = self._positions.pop(new_id)
+            self._rebuild_indexes()
+            raise
+        return True
+    def _delete(self, id):
+        pos = self._positions.pop(id, None)
+        if pos is None:
+            return False
+        self._unindex_employee(self.employees[pos])
+        # На место удалённого переносим последнего сотрудника, чтобы не сдвигать список
+        last = self.employees.pop()
+        if pos < len(self.employees):
+            self.employees[pos] = last
+            self._positions[last.id] = pos
+        return True
+    def _truncate(self, size):
+        # Отмена массового добавления из import_file: убирает записи с конца списка
+        for employee in self.employees[size:]:
+            del self._positions[employee.id]
+        del self.employees[size:]
+        # Если индексы уже успели перестроить с новыми записями — строим заново
+        if len(self._orders['id']) != len(self.employees):
+            self._rebuild_indexes()
+    def _restore(self, employee, pos):
+        # Возвращает удалённого сотрудника на прежнее место (обратная операция к _delete)
+        self._add(employee)
+        last = len(self.employees) - 1
+        if pos < last:
+            moved = self.employees[pos]
+            self.employees[pos], self.employees[last] = employee, moved
+            self._positions[employee.id], self._positions[moved.id] = pos, last
+    def _record(self, entry, undo):
+        if self._batch is None:
+            self._persist([entry])
+        else:
+            self._batch.append(entry)
+            self._undo.append(undo)
+    @contextlib.contextmanager
+    def _writing(self):
+        # Изменения вносятся под межпроцессной блокировкой и поверх самых свежих данных
+        with self.storage.lock:
+            if self._batch is None:
+                self.refresh()
+            yield
+    @contextlib.contextmanager
+    def batch(self):
+        with self._writing():
+            outer = self._batch is None
+            if outer:
+                self._batch, self._undo = [], []
+            mark = len(self._undo)
+            try:
+                yield self
+            except BaseException:
+                # Откатываем в памяти всё, что сделано внутри этого пакета
+                while len(self._undo) > mark:
+                    self._undo.pop()()
+                del self._batch[mark:]
+                if outer:
+                    self._batch = self._undo = None
+                raise
+            if outer:
+                entries, self._batch, self._undo = self._batch, None, None
+                if entries:
+                    self._persist(entries)
+    def add_employee(self, employee):
+        with self._writing():
+            if not self._add(employee):
+                print(f"Сотрудник с ID {employee.id} уже существует!")
+                return False
+            self._record({'op': 'add', 'employee': employee.to_dict()},
+                         lambda: self._delete(employee.id))
+            return True
+    def get_employee(self, id):
+        pos = self._positions.get(id)
+        if pos is None:
+            return None
+        return self.employees[pos]
+    def index_of(self, id):
+        return self._positions.get(id)
+    def update_employee(self, id, new_data):
+        with self._writing():
+            employee = self.get_employee(id)
+            if not employee:
+                return False
+            old_data = {key: getattr(employee, key, None) for key in new_data}
+            if not self._update(id, new_data):
+                return False
+            self._record({'op': 'update', 'id': id, 'data': dict(new_data)},
+                         lambda: self._update(employee.id, old_data))
+            return True
+    def delete_employee(self, id):
+        with self._writing():
+            pos = self._positions.get(id)
+            if pos is None:
+                return False
+            employee = self.employees[pos]
+            self._delete(id)
+            self._record({'op': 'delete', 'id': id},
+                         lambda: self._restore(employee, pos))
+            return True
+    def add_many(self, employees):
+        try:
+            with self.batch():
+                for employee in employees:
+                    if not self.add_employee(employee):
+                        raise ValueError(employee.id)
+        except ValueError:
+            return False
+        return True
+    def update_many(self, updates):
+        try:
+            with self.batch():
+                for id, new_data in updates.items():
+                    if not self.update_employee(id, new_data):
+                        raise ValueError(id)
+        except ValueError:
+            return False
+        return True
+    def delete_many(self, ids):
+        try:
+            with self.batch():
+                for id in ids:
+                    if not self.delete_employee(id):
+                        raise ValueError(id)
+        except ValueError:
+            return False
+        return True
+    def list_employees(self):
+        return self.employees
+    def list_page(self, sort='id', after=None, limit=50, descending=False):
+        # Страница по курсору: курсор — пара (значение, id) последней выданной записи,
+        # поэтому переход к следующей странице стоит O(log n) и не требует сортировки
+        order = self._orders[sort]
+        if descending:
+            end = len(order) if after is None else bisect.bisect_left(order, tuple(after))
+            chunk = order[max(0, end - limit):end][::-1]
+            more = end - limit > 0
+        else:
+            start = 0 if after is None else bisect.bisect_right(order, tuple(after))
+            chunk = order[start:start + limit]
+            more = start + limit < len(order)
+        page = [self.employees[self._positions[emp_id]] for _, emp_id in chunk]
+        cursor = chunk[-1] if chunk and more else None
+        return page, cursor
+    def _salary_bounds(self, min_salary, max_salary):
+        salaries = self._orders['salary']
+        lo = 0 if min_salary is None else bisect.bisect_left(salaries, (min_salary,))
+        hi = len(salaries) if max_salary is None else bisect.bisect_left(salaries, (math.nextafter(max_salary, math.inf),))
+        return lo, max(lo, hi)
+    def _name_candidates(self, text):
+        if len(text) >= 3:
+            sets = sorted((self._name_grams.get(gram, set()) for gram in _trigrams(text)), key=len)
+            return sets[0].intersection(*sets[1:])
+        if 'name' in self._indexes:
+            # Для одного-двух символов перебираем различные имена, а не всех сотрудников
+            ids = set()
+            for name, name_ids in self._indexes['name'].items():
+                if text in str(name).lower():
+                    ids.update(name_ids)
+            return ids
+        return None
+    def search_employees(self, min_salary=None, max_salary=None, name_contains=None, name_prefix=None, **kwargs):
+        criteria = {key: value for key, value in kwargs.items() if value}
+        key = (min_salary, max_salary, name_contains, name_prefix, tuple(sorted(criteria.items())))
+        try:
+            cached = self._cache.get(key)
+        except TypeError:
+            key, cached = None, None
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return list(cached)
+        results = self._search(min_salary, max_salary, name_contains, name_prefix, criteria)
+        if key is not None:
+            self._cache[key] = results
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return list(results)
+    def _search(self, min_salary, max_salary, name_contains, name_prefix, criteria):
+        # Кандидаты из индексов; проверку начинаем с самого селективного
+        candidates = []
+        if 'id' in criteria:
+            id = criteria.pop('id')
+            candidates.append({id} if id in self._positions else set())
+        for key in list(criteria):
+            if key in self._indexes:
+                candidates.append(self._indexes[key].get(criteria.pop(key), set()))
+        name_parts = [text.lower() for text in (name_contains, name_prefix) if text]
+        for text in name_parts:
+            ids = self._name_candidates(text)
+            if ids is not None:
+                candidates.append(ids)
+        salary_range = None
+        if min_salary is not None or max_salary is not None:
+            salary_range = self._salary_bounds(min_salary, max_salary)
+        if salary_range and (not candidates or salary_range[1] - salary_range[0] < min(map(len, candidates))):
+            lo, hi = salary_range
+            candidates.append({emp_id for _, emp_id in self._orders['salary'][lo:hi]})
+            salary_range = None
+        if candidates:
+            candidates.sort(key=len)
+            first, rest = candidates[0], candidates[1:]
+            ids = [emp_id for emp_id in first if all(emp_id in other for other in rest)]
+            ids.sort(key=self._positions.__getitem__)
+            employees = [self.employees[self._positions[emp_id]] for emp_id in ids]
+        else:
+            employees = self.employees
+        results = []
+        for emp in employees:
+            if salary_range and not ((min_salary is None or emp.salary >= min_salary) and
+                                     (max_salary is None or emp.salary <= max_salary)):
+                continue
+            if name_parts:
+                name = str(emp.name).lower()
+                if name_contains and name_contains.lower() not in name:
+                    continue
+                if name_prefix and not name.startswith(name_prefix.lower()):
+                    continue
+            match = True
+            for key, value in criteria.items():
+                if getattr(emp, key, None) != value:
+                    match = False
+                    break
+            if match:
+                results.append(emp)
+        return results
\ No newline at end of file
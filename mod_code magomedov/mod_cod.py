@@ -1,89 +1,9 @@
 import sys
-import json
-import os
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                             QTableWidget, QTableWidgetItem, QPushButton, QDialog, QLabel,
-                             QLineEdit, QMessageBox, QFormLayout, QDialogButtonBox)
-class Employee:
-    def __init__(self, id, name, position, department, salary, phone, email):
-        self.id = id
-        self.name = name
-        self.position = position
-        self.department = department
-        self.salary = salary
-        self.phone = phone
-        self.email = email
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'position': self.position, 
-            'department': self.department,
-            'salary': self.salary,
-            'phone': self.phone,
-            'email': self.email
-        }
-class InformationSystem:
-    def __init__(self, file_name='employees.json'):
-        self.file_name = file_name
-        self.employees = []
-        self.load_data()
-    def load_data(self):
-        if os.path.exists(self.file_name):
-            try:
-                with open(self.file_name, 'r') as file:
-                    data = json.load(file)
-                    self.employees = [Employee(**item) for item in data]
-            except (json.JSONDecodeError, Exception) as e:
-                print(f"Ошибка загрузки данных: {e}")
-                self.employees = []
-    def save_data(self):
-        try:
-            with open(self.file_name, 'w') as file:
-                json.dump([emp.to_dict() for emp in self.employees], file, indent=4)
-        except Exception as e:
-            print(f"Ошибка сохранения данных: {e}")
-    def add_employee(self, employee):
-        if self.get_employee(employee.id):
-            print(f"Сотрудник с ID {employee.id} уже существует!")
-            return False
-        self.employees.append(employee)
-        self.save_data()
-        return True
-    def get_employee(self, id):
-        for emp in self.employees:
-            if emp.id == id:
-                return emp
-        return None
-    def update_employee(self, id, new_data):
-        employee = self.get_employee(id)
-        if employee:
-            for key, value in new_data.items():
-                setattr(employee, key, value)
-            self.save_data()
-            return True
-        return False
-    def delete_employee(self, id):
-        employee = self.get_employee(id)
-        if employee:
-            self.employees.remove(employee)
-            self.save_data()
-            return True
-        return False
-    def list_employees(self):
-        return self.employees
-    def search_employees(self, **kwargs):
-        results = []
-        for emp in self.employees:
-            match = True
-            for key, value in kwargs.items():
-                if value and getattr(emp, key, None) != value:
-                    match = False
-                    break
-            if match:
-                results.append(emp)
-        return results
-
+                             QTableView, QAbstractItemView, QPushButton, QDialog, QLabel,
+                             QLineEdit, QMessageBox, QFormLayout, QDialogButtonBox, QProgressBar)
+from info_system import Employee, InformationSystem, OperationCancelled, StorageBusy
 class EmployeeDialog(QDialog):
     def __init__(self, parent=None, employee=None):
         super().__init__(parent)
@@ -159,20 +79,154 @@ class SearchDialog(QDialog):
         if self.department_input.text().strip():
             params['department'] = self.department_input.text().strip()
         return params
+class EmployeeTableModel(QAbstractTableModel):
+    # Таблица читает данные прямо из InformationSystem: ячейки создаются только для видимых строк
+    HEADERS = ["ID", "Имя", "Должность", "Отдел", "Зарплата", "Телефон", "Email"]
+    def __init__(self, system, parent=None):
+        super().__init__(parent)
+        self.system = system
+        # None — показываем всех сотрудников, иначе список результатов поиска
+        self.results = None
+    def rows(self):
+        return self.system.employees if self.results is None else self.results
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows())
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(Employee.__slots__)
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        return str(getattr(self.rows()[index.row()], Employee.__slots__[index.column()]))
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+    def employee_at(self, row):
+        return self.rows()[row]
+    def show_all(self):
+        self.beginResetModel()
+        self.results = None
+        self.endResetModel()
+    def show_results(self, results):
+        self.beginResetModel()
+        self.results = results
+        self.endResetModel()
+    def sync(self):
+        # Изменения других процессов подтягиваются до расчёта номеров строк, иначе refresh
+        # внутри записи сдвинет строки между begin*Rows и end*Rows. Вызывать под storage.lock
+        if self.system.refresh() and self.results is None:
+            self.show_all()
+    def add_employee(self, employee):
+        with self.system.storage.lock:
+            self.sync()
+            if self.results is not None:
+                self.show_all()
+            if self.system.get_employee(employee.id):
+                return False
+            row = len(self.system.employees)
+            self.beginInsertRows(QModelIndex(), row, row)
+            added = self.system.add_employee(employee)
+            self.endInsertRows()
+            return added
+    def update_employee(self, row, new_data):
+        employee = self.employee_at(row)
+        with self.system.storage.lock:
+            self.sync()
+            if self.results is None:
+                row = self.system.index_of(employee.id)
+            if row is None or not self.system.update_employee(employee.id, new_data):
+                return False
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        return True
+    def delete_employee(self, row):
+        employee = self.employee_at(row)
+        with self.system.storage.lock:
+            self.sync()
+            if self.results is not None:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                deleted = self.system.delete_employee(employee.id)
+                if deleted:
+                    del self.results[row]
+                self.endRemoveRows()
+                return deleted
+            # После sync сотрудник мог сменить позицию или исчезнуть
+            row = self.system.index_of(employee.id)
+            if row is None:
+                return False
+            # InformationSystem переносит последнего сотрудника на место удалённого
+            last = len(self.system.employees) - 1
+            self.beginRemoveRows(QModelIndex(), last, last)
+            deleted = self.system.delete_employee(employee.id)
+            self.endRemoveRows()
+        if deleted and row < last:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        return deleted
+class WorkerSignals(QObject):
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+class Worker(QRunnable):
+    # Выполняет операцию InformationSystem в пуле потоков, результат приходит сигналами в GUI-поток
+    def __init__(self, fn, *args, progress=False, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        if progress:
+            self.kwargs['progress'] = self.report
+        self.signals = WorkerSignals()
+        self.is_cancelled = False
+    def cancel(self):
+        self.is_cancelled = True
+    def report(self, done, total):
+        if self.is_cancelled:
+            raise OperationCancelled()
+        self.signals.progress.emit(done, total)
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except OperationCancelled:
+            self.signals.cancelled.emit()
+            return
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        if self.is_cancelled:
+            self.signals.cancelled.emit()
+        else:
+            self.signals.finished.emit(result)
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.system = InformationSystem()
+        # Загрузка и запись снимка выполняются в фоне, см. start_load и maybe_compact
+        self.system = InformationSystem(autoload=False, auto_compact=False)
+        self.thread_pool = QThreadPool.globalInstance()
+        self.worker = None
+        self.loaded = False
         self.setWindowTitle("Информационная система сотрудников")
         self.resize(800, 600)
         self.init_ui()
-        self.load_employees()
+        self.start_load()
     def init_ui(self):
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
         layout = QVBoxLayout(central_widget)
-        self.table = QTableWidget(0, 7)
-        self.table.setHorizontalHeaderLabels(["ID", "Имя", "Должность", "Отдел", "Зарплата", "Телефон", "Email"])
+        self.live_search = QLineEdit()
+        self.live_search.setPlaceholderText("Поиск по имени...")
+        layout.addWidget(self.live_search)
+        # Поиск запускается, когда пользователь перестал печатать
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(200)
+        # Периодически подхватываем изменения, сделанные другими копиями программы
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(2000)
+        self.model = EmployeeTableModel(self.system, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
         layout.addWidget(self.table)
         btn_layout = QHBoxLayout()
         self.add_btn = QPushButton("Добавить")
@@ -186,24 +240,94 @@ class MainWindow(QMainWindow):
         btn_layout.addWidget(self.search_btn)
         btn_layout.addWidget(self.refresh_btn)
         layout.addLayout(btn_layout)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        self.cancel_btn = QPushButton("Отмена")
+        self.statusBar().addPermanentWidget(self.progress_bar)
+        self.statusBar().addPermanentWidget(self.cancel_btn)
+        self.progress_bar.hide()
+        self.cancel_btn.hide()
         self.add_btn.clicked.connect(self.add_employee)
         self.edit_btn.clicked.connect(self.edit_employee)
         self.delete_btn.clicked.connect(self.delete_employee)
         self.search_btn.clicked.connect(self.search_employee)
         self.refresh_btn.clicked.connect(self.load_employees)
+        self.cancel_btn.clicked.connect(self.cancel_worker)
+        self.live_search.textChanged.connect(self.search_timer.start)
+        self.search_timer.timeout.connect(self.run_live_search)
+        self.poll_timer.timeout.connect(self.poll_changes)
+        self.poll_timer.start()
+    def run_in_background(self, message, on_finished, fn, *args, progress=False, **kwargs):
+        worker = Worker(fn, *args, progress=progress, **kwargs)
+        worker.signals.progress.connect(self.show_progress)
+        worker.signals.finished.connect(on_finished)
+        worker.signals.cancelled.connect(self.on_worker_cancelled)
+        worker.signals.failed.connect(self.on_worker_failed)
+        self.worker = worker
+        self.set_busy(True, message)
+        self.thread_pool.start(worker)
+    def set_busy(self, busy, message=""):
+        # Пока работает фоновая операция, изменять данные нельзя: она читает или заполняет их
+        for widget in (self.add_btn, self.edit_btn, self.delete_btn, self.search_btn, self.live_search):
+            widget.setEnabled(not busy and self.loaded)
+        self.refresh_btn.setEnabled(not busy)
+        self.progress_bar.setVisible(busy)
+        self.progress_bar.setValue(0)
+        self.cancel_btn.setVisible(busy)
+        if not busy:
+            self.worker = None
+        self.statusBar().showMessage(message)
+    def show_progress(self, done, total):
+        if total:
+            self.progress_bar.setValue(int(done * 1000 / total))
+    def cancel_worker(self):
+        if self.worker is not None:
+            self.worker.cancel()
+    def on_worker_cancelled(self):
+        self.set_busy(False, "Операция отменена")
+    def on_worker_failed(self, error):
+        self.set_busy(False)
+        QMessageBox.critical(self, "Ошибка", error)
+    def start_load(self):
+        # Пока идёт загрузка, таблица не обращается к заполняемому списку
+        self.model.show_results([])
+        self.run_in_background("Загрузка данных...", self.on_loaded, self.system.load_data, progress=True)
+        self.worker.signals.cancelled.connect(self.on_load_cancelled)
+    def on_loaded(self, _):
+        self.loaded = True
+        self.set_busy(False, f"Загружено сотрудников: {len(self.system.employees)}")
+        self.update_view(reset=True)
+    def on_load_cancelled(self):
+        if self.loaded:
+            self.update_view(reset=True)
+    def maybe_compact(self):
+        if not self.system.compaction_due:
+            return
+        # Чужие изменения применяются здесь, в потоке интерфейса: таблица читает тот же список.
+        # В фоне только пишется снимок; если за это время кто-то допишет журнал, снимок
+        # не запишется, и сжатие повторится после следующего изменения
+        changed = self.system.refresh(reload=False)
+        if changed is None:
+            self.start_load()
+            return
+        if changed:
+            self.update_view()
+        self.run_in_background("Сохранение данных...", lambda _: self.set_busy(False), self.system.save_snapshot)
+    def update_view(self, reset=False):
+        # reset=True — после загрузки: start_load оставил в таблице пустой список результатов
+        if self.live_search.text().strip():
+            self.run_live_search()
+        elif reset or self.model.results is None:
+            self.model.show_all()
+    def closeEvent(self, event):
+        self.cancel_worker()
+        self.thread_pool.waitForDone()
+        super().closeEvent(event)
     def load_employees(self):
-        employees = self.system.list_employees()
-        self.table.setRowCount(0)
-        for emp in employees:
-            row_pos = self.table.rowCount()
-            self.table.insertRow(row_pos)
-            self.table.setItem(row_pos, 0, QTableWidgetItem(emp.id))
-            self.table.setItem(row_pos, 1, QTableWidgetItem(emp.name))
-            self.table.setItem(row_pos, 2, QTableWidgetItem(emp.position))
-            self.table.setItem(row_pos, 3, QTableWidgetItem(emp.department))
-            self.table.setItem(row_pos, 4, QTableWidgetItem(str(emp.salary)))
-            self.table.setItem(row_pos, 5, QTableWidgetItem(emp.phone))
-            self.table.setItem(row_pos, 6, QTableWidgetItem(emp.email))
+        if self.loaded:
+            self.model.show_all()
+        else:
+            self.start_load()
     def add_employee(self):
         dialog = EmployeeDialog(self)
         if dialog.exec_() == QDialog.Accepted:
@@ -212,64 +336,77 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, "Ошибка", "Сотрудник с таким ID уже существует!")
                 return
             employee = Employee(**data)
-            if self.system.add_employee(employee):
+            if self.model.add_employee(employee):
                 QMessageBox.information(self, "Успех", "Сотрудник успешно добавлен!")
-                self.load_employees()
+                self.maybe_compact()
             else:
                 QMessageBox.critical(self, "Ошибка", "Не удалось добавить сотрудника!")
     def edit_employee(self):
-        selected = self.table.currentRow()
+        selected = self.table.currentIndex().row()
         if selected < 0:
             QMessageBox.warning(self, "Ошибка", "Выберите сотрудника для редактирования!")
             return
-        emp_id = self.table.item(selected, 0).text()
-        employee = self.system.get_employee(emp_id)
-        if not employee:
+        employee = self.model.employee_at(selected)
+        if not self.system.get_employee(employee.id):
             QMessageBox.warning(self, "Ошибка", "Сотрудник не найден!")
             return
         dialog = EmployeeDialog(self, employee)
         if dialog.exec_() == QDialog.Accepted:
             data = dialog.get_data()
-            if self.system.update_employee(emp_id, data):
+            if self.model.update_employee(selected, data):
                 QMessageBox.information(self, "Успех", "Данные успешно обновлены!")
-                self.load_employees()
+                self.maybe_compact()
             else:
                 QMessageBox.critical(self, "Ошибка", "Не удалось обновить данные сотрудника!")
     def delete_employee(self):
-        selected = self.table.currentRow()
+        selected = self.table.currentIndex().row()
         if selected < 0:
             QMessageBox.warning(self, "Ошибка", "Выберите сотрудника для удаления!")
             return
-        emp_id = self.table.item(selected, 0).text()
+        emp_id = self.model.employee_at(selected).id
         reply = QMessageBox.question(self, "Подтверждение", f"Вы действительно хотите удалить сотрудника с ID {emp_id}?",
                                      QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
-            if self.system.delete_employee(emp_id):
+            if self.model.delete_employee(selected):
                 QMessageBox.information(self, "Успех", "Сотрудник успешно удален!")
-                self.load_employees()
+                self.maybe_compact()
             else:
                 QMessageBox.critical(self, "Ошибка", "Не удалось удалить сотрудника!")
     def search_employee(self):
         dialog = SearchDialog(self)
         if dialog.exec_() == QDialog.Accepted:
             params = dialog.get_search_params()
-            results = self.system.search_employees(**params)
-            if results:
-                self.table.setRowCount(0)
-                for emp in results:
-                    row_pos = self.table.rowCount()
-                    self.table.insertRow(row_pos)
-                    self.table.setItem(row_pos, 0, QTableWidgetItem(emp.id))
-                    self.table.setItem(row_pos, 1, QTableWidgetItem(emp.name))
-                    self.table.setItem(row_pos, 2, QTableWidgetItem(emp.position))
-                    self.table.setItem(row_pos, 3, QTableWidgetItem(emp.department))
-                    self.table.setItem(row_pos, 4, QTableWidgetItem(str(emp.salary)))
-                    self.table.setItem(row_pos, 5, QTableWidgetItem(emp.phone))
-                    self.table.setItem(row_pos, 6, QTableWidgetItem(emp.email))
-            else:
-                QMessageBox.information(self, "Результаты", "Сотрудники не найдены.")
+            self.run_in_background("Поиск...", self.on_search_finished, self.system.search_employees, **params)
+    def poll_changes(self):
+        if not self.loaded or self.worker is not None:
+            return
+        # Журнал дочитывается сразу, а полная перезагрузка после уплотнения
+        # другим процессом идёт в фоне, как при запуске
+        changed = self.system.refresh(reload=False)
+        if changed is None:
+            self.start_load()
+        elif changed:
+            self.update_view()
+    def run_live_search(self):
+        text = self.live_search.text().strip()
+        if not text:
+            self.model.show_all()
+            return
+        results = self.system.search_employees(name_contains=text)
+        self.model.show_results(results)
+        self.statusBar().showMessage(f"Найдено сотрудников: {len(results)}")
+    def on_search_finished(self, results):
+        self.set_busy(False)
+        if results:
+            self.model.show_results(results)
+        else:
+            QMessageBox.information(self, "Результаты", "Сотрудники не найдены.")
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    window = MainWindow()
+    try:
+        window = MainWindow()
+    except StorageBusy as e:
+        QMessageBox.critical(None, "Ошибка", str(e))
+        sys.exit(1)
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,271 @@
+import sys
+import json
+import queue
+import signal
+import asyncio
+import argparse
+import threading
+import http.client
+import urllib.parse
+from info_system import Employee, InformationSystem, OwnerLock, StorageBusy, open_storage, coerce_field, validate_rows
+class BackgroundWriter:
+    # Обёртка над хранилищем: журнал и снимки пишутся в отдельном потоке строго по очереди,
+    # поэтому сервер отвечает на запросы, не дожидаясь диска.
+    # Снимок получает копию записей на момент вызова, так что следующие записи журнала его не теряют.
+    # Межпроцессную блокировку файла берёт поток записи; цикл событий держит только свою,
+    # иначе он ждал бы каждого снимка
+    def __init__(self, storage, compact_every=1000):
+        self.storage = storage
+        self.lock = threading.RLock()
+        self.compact_every = compact_every
+        self._entries = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    def load(self, progress=None):
+        # Читается один раз при запуске, пока поток записи ещё ничего не делает
+        with self.storage.lock:
+            yield from self.storage.load(progress)
+    def replay(self):
+        with self.storage.lock:
+            yield from self.storage.replay()
+    def changes(self):
+        # Сервер — единственный владелец файла (см. OwnerLock в serve), остальные работают через него
+        return []
+    def pending(self):
+        return False
+    def get(self, id):
+        return self.storage.get(id)
+    def append(self, entries):
+        self._queue.put(('append', list(entries)))
+        self._entries += len(entries)
+        return self._entries >= self.compact_every
+    def save(self, employees):
+        # Цикл событий меняет объекты Employee на месте, поэтому в очередь идут кортежи значений
+        self._queue.put(('save', [(emp.id, emp.name, emp.position, emp.department, emp.salary, emp.phone, emp.email)
+                                  for emp in employees]))
+        self._entries = 0
+    def _run(self):
+        while True:
+            op, payload = self._queue.get()
+            try:
+                if op == 'append':
+                    with self.storage.lock:
+                        self.storage.append(payload)
+                elif op == 'save':
+                    with self.storage.lock:
+                        self.storage.save(Employee(*row) for row in payload)
+                elif op == 'stop':
+                    return
+            except Exception as e:
+                print(f"Ошибка записи данных: {e}", file=sys.stderr)
+            finally:
+                self._queue.task_done()
+    def close(self):
+        self._queue.put(('stop', None))
+        self._thread.join()
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 409: 'Conflict', 500: 'Internal Server Error'}
+class EmployeeServer:
+    # Все обращения к InformationSystem идут из одного потока цикла событий, поэтому блокировки не нужны
+    def __init__(self, system, idle_timeout=60):
+        self.system = system
+        self.idle_timeout = idle_timeout
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                body = await reader.readexactly(length) if length else b''
+                status, payload = self.dispatch(method, target, body)
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ValueError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    def dispatch(self, method, target, body):
+        url = urllib.parse.urlsplit(target)
+        parts = [urllib.parse.unquote(part) for part in url.path.strip('/').split('/') if part]
+        query = dict(urllib.parse.parse_qsl(url.query))
+        try:
+            data = json.loads(body) if body else None
+            if parts == ['employees']:
+                if method == 'GET':
+                    return 200, self.list_employees(query)
+                if method == 'POST':
+                    return self.add_employees(data)
+                if method == 'PATCH':
+                    return self.update_employees(data)
+                if method == 'DELETE':
+                    return self.delete_employees(data)
+            elif len(parts) == 2 and parts[0] == 'employees':
+                if method == 'GET':
+                    employee = self.system.get_employee(parts[1])
+                    if employee is None:
+                        raise HttpError(404, "Сотрудник не найден")
+                    return 200, employee.to_dict()
+                if method == 'PATCH':
+                    return self.update_employees({parts[1]: data})
+                if method == 'DELETE':
+                    return self.delete_employees([parts[1]])
+            elif parts == ['search'] and method == 'GET':
+                return 200, [emp.to_dict() for emp in self.search(query)]
+            elif parts == ['report'] and method == 'GET':
+                by = query.get('by', 'department')
+                return 200, self.system.salary_report(None if by == 'all' else by)
+            else:
+                raise HttpError(404, "Неизвестный адрес")
+            raise HttpError(405, "Метод не поддерживается")
+        except HttpError as e:
+            return e.status, {'error': str(e)}
+        except (ValueError, TypeError, KeyError) as e:
+            return 400, {'error': f"Некорректный запрос: {e}"}
+    def list_employees(self, query):
+        # Курсор — JSON-пара [значение, id] из поля next предыдущей страницы
+        after = json.loads(query['after']) if 'after' in query else None
+        page, cursor = self.system.list_page(query.get('sort', 'id'), after, int(query.get('limit', 100)),
+                                             query.get('order') == 'desc')
+        return {
+            'total': len(self.system.list_employees()),
+            'items': [emp.to_dict() for emp in page],
+            'next': list(cursor) if cursor else None,
+        }
+    def search(self, query):
+        for key in ('min_salary', 'max_salary'):
+            if key in query:
+                query[key] = float(query[key])
+        if 'salary' in query:
+            query['salary'] = float(query['salary'])
+        return self.system.search_employees(**query)
+    def add_employees(self, data):
+        # Записи проверяются и приводятся к типам по тем же правилам, что и при импорте
+        items = data if isinstance(data, list) else [data]
+        if not all(isinstance(item, dict) for item in items):
+            raise HttpError(400, "Ожидается объект сотрудника или список объектов")
+        valid, errors = validate_rows(1, items)
+        if errors:
+            raise HttpError(400, "; ".join(errors))
+        if not self.system.add_many([Employee.from_dict(record) for number, record in valid]):
+            raise HttpError(409, "Сотрудник с таким ID уже существует")
+        return 201, {'added': len(items)}
+    def update_employees(self, data):
+        if not isinstance(data, dict) or not all(isinstance(new_data, dict) for new_data in data.values()):
+            raise HttpError(400, "Ожидается объект вида {id: {поле: значение}}")
+        updates = {}
+        for id, new_data in data.items():
+            try:
+                updates[id] = {key: coerce_field(key, value) for key, value in new_data.items()}
+            except ValueError:
+                raise HttpError(400, f"{id}: некорректная зарплата {new_data.get('salary')!r}")
+            if 'id' in updates[id] and not updates[id]['id']:
+                raise HttpError(400, f"{id}: пустой ID")
+        if not self.system.update_many(updates):
+            raise HttpError(404, "Не удалось обновить данные сотрудников")
+        return 200, {'updated': len(data)}
+    def delete_employees(self, ids):
+        if not isinstance(ids, list) or not self.system.delete_many(ids):
+            raise HttpError(404, "Не удалось удалить сотрудников")
+        return 200, {'deleted': len(ids)}
+class EmployeeClient:
+    # Клиент для скриптов: одно соединение с keep-alive на все запросы
+    def __init__(self, host='127.0.0.1', port=8765):
+        self.connection = http.client.HTTPConnection(host, port)
+    def request(self, method, path, data=None):
+        body = json.dumps(data).encode('utf-8') if data is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        self.connection.request(method, path, body, headers)
+        response = self.connection.getresponse()
+        payload = json.loads(response.read())
+        if response.status >= 400:
+            raise RuntimeError(f"{response.status}: {payload.get('error')}")
+        return payload
+    def get(self, id):
+        return self.request('GET', '/employees/' + urllib.parse.quote(str(id), safe=''))
+    def list(self, sort='id', after=None, limit=100, descending=False):
+        query = {'sort': sort, 'limit': limit}
+        if after is not None:
+            query['after'] = json.dumps(list(after))
+        if descending:
+            query['order'] = 'desc'
+        return self.request('GET', '/employees?' + urllib.parse.urlencode(query))
+    def search(self, **kwargs):
+        return self.request('GET', '/search?' + urllib.parse.urlencode(kwargs))
+    def report(self, by='department'):
+        return self.request('GET', '/report?by=' + urllib.parse.quote(by or 'all'))
+    def add_many(self, employees):
+        return self.request('POST', '/employees', [emp.to_dict() for emp in employees])
+    def update_many(self, updates):
+        return self.request('PATCH', '/employees', updates)
+    def delete_many(self, ids):
+        return self.request('DELETE', '/employees', list(ids))
+    def close(self):
+        self.connection.close()
+async def serve(args):
+    # Пока сервер работает, программы не могут открыть файл напрямую, и наоборот
+    owner = OwnerLock(args.file + '.owner')
+    if not owner.acquire(exclusive=True):
+        raise StorageBusy(f"Файл {args.file} уже открыт другими программами")
+    storage = BackgroundWriter(open_storage(args.file), args.compact_every)
+    system = InformationSystem(args.file, storage=storage)
+    server = EmployeeServer(system)
+    if args.unix:
+        listener = await asyncio.start_unix_server(server.handle_client, path=args.unix)
+        print(f"Сервер слушает {args.unix}", file=sys.stderr)
+    else:
+        listener = await asyncio.start_server(server.handle_client, args.host, args.port)
+        print(f"Сервер слушает http://{args.host}:{args.port}", file=sys.stderr)
+    stop = asyncio.Event()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    except (NotImplementedError, AttributeError):
+        pass
+    try:
+        async with listener:
+            await stop.wait()
+    finally:
+        storage.close()
+        owner.release()
+def main():
+    parser = argparse.ArgumentParser(description="HTTP-сервер информационной системы сотрудников")
+    parser.add_argument('--file', default='employees.json')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="путь к Unix-сокету вместо TCP")
+    parser.add_argument('--compact-every', type=int, default=1000)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    except StorageBusy as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+if __name__ == "__main__":
+    main()